@@ -0,0 +1,103 @@
+"""
+画布基准测试：在离屏窗口中平移大型流程图，测量每帧耗时是否随文档大小增长
+
+用法：python benchmarks/bench_canvas.py [--frames 60] [--sizes 1000,10000,50000]
+      [--zooms 1.0,0.25,0.02] [--tile-mb 64] [--output result.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import Document, NodeKind
+from stk import Canvas, Game
+
+WIDTH, HEIGHT = 1000, 1000
+SPACING_X, SPACING_Y = 160, 80
+
+def make_document(n: int) -> Document:
+    """按网格排列n个节点，每个节点连向右侧和下方的节点"""
+    doc = Document()
+    cols = max(1, int(n ** 0.5))
+    kinds = list(NodeKind)
+    for i in range(n):
+        doc.add_node(kinds[i % len(kinds)], (i % cols) * SPACING_X, (i // cols) * SPACING_Y, 120, 40, f"步骤 {i}")
+    for i in range(n):
+        if (i + 1) % cols and i + 1 < n:
+            doc.add_edge(i, i + 1)
+        if i + cols < n:
+            doc.add_edge(i, i + cols)
+    return doc
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+def run_case(doc: Document, zoom: float, frames: int, tile_mb: float = 64) -> Dict[str, Any]:
+    """从文档中心开始每帧平移一段距离，tile_mb为0时不使用瓦片缓存"""
+    game = Game(headless=True)
+    game.window.update_window((WIDTH, HEIGHT))
+    canvas = Canvas(game.window, 0, 0, WIDTH, HEIGHT, document=doc, tile_budget_mb=tile_mb)
+    game.stks = [canvas]
+    game.dirty_rendering = True
+    canvas.zoom_at(zoom)
+    cols = max(1, int(doc.node_count() ** 0.5))
+    canvas.center_on(cols * SPACING_X / 2, doc.node_count() / cols * SPACING_Y / 2)
+    game.run(frames=1)
+    times = []
+    visible = 0
+    for frame in range(frames):
+        start = time.perf_counter()
+        canvas.pan(-13, -7)
+        game.run(frames=1)
+        times.append(time.perf_counter() - start)
+        visible = max(visible, len(canvas.visible_nodes()))
+    canvas.unbind()
+    canvas.close()
+    total = sum(times)
+    return {
+        'nodes': doc.node_count(),
+        'edges': doc.edge_count(),
+        'zoom': zoom,
+        'tile_mb': tile_mb,
+        'visible_nodes': visible,
+        'frames': frames,
+        'fps': round(frames / total, 2) if total else 0.0,
+        'p50_ms': round(percentile(times, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(times, 0.95) * 1000, 3),
+        'max_ms': round(max(times) * 1000, 3),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=60)
+    parser.add_argument('--sizes', default='1000,10000,50000')
+    parser.add_argument('--zooms', default='1.0,0.25,0.02')
+    parser.add_argument('--tile-mb', type=float, default=64, help="瓦片缓存预算，0表示直接绘制")
+    parser.add_argument('--output', help="写入JSON文件，默认输出到标准输出")
+    args = parser.parse_args()
+
+    results = []
+    for n in (int(size) for size in args.sizes.split(',')):
+        doc = make_document(n)
+        for zoom in (float(z) for z in args.zooms.split(',')):
+            result = run_case(doc, zoom, args.frames, args.tile_mb)
+            results.append(result)
+            print(
+                f"{n:>6} nodes zoom {zoom:<5} {result['visible_nodes']:>6} visible "
+                f"{result['fps']:>8.1f}fps p95 {result['p95_ms']:.2f}ms",
+                file=sys.stderr
+            )
+    text = json.dumps({'frames': args.frames, 'results': results}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
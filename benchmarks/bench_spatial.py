@@ -0,0 +1,64 @@
+"""
+空间索引基准测试：对比GridIndex与线性扫描的点查询耗时，找出两者的交叉点
+
+用法：python benchmarks/bench_spatial.py [--queries 2000] [--seed 0]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from stk.spatial import GridIndex
+
+SIZES = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 16384)
+
+def make_rects(n: int, rng: random.Random) -> list[pygame.Rect]:
+    """在1000x1000的区域内随机生成按钮大小的矩形"""
+    return [
+        pygame.Rect(rng.randrange(0, 960), rng.randrange(0, 970), rng.randrange(20, 120), rng.randrange(20, 50))
+        for _ in range(n)
+    ]
+
+def bench_linear(rects: list[pygame.Rect], points: list[tuple[int, int]]) -> float:
+    """每次查询遍历所有矩形"""
+    start = time.perf_counter()
+    for pos in points:
+        [r for r in rects if r.collidepoint(pos)]
+    return (time.perf_counter() - start) / len(points)
+
+def bench_grid(rects: list[pygame.Rect], points: list[tuple[int, int]]) -> float:
+    """通过网格索引查询"""
+    index = GridIndex()
+    for i, r in enumerate(rects):
+        index.insert(i, r)
+    start = time.perf_counter()
+    for pos in points:
+        index.query_point(pos)
+    return (time.perf_counter() - start) / len(points)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    points = [(rng.randrange(0, 1000), rng.randrange(0, 1000)) for _ in range(args.queries)]
+    crossover = None
+    print(f"{'n':>6} {'linear(us)':>12} {'grid(us)':>10}")
+    for n in SIZES:
+        rects = make_rects(n, rng)
+        linear = bench_linear(rects, points) * 1e6
+        grid = bench_grid(rects, points) * 1e6
+        if crossover is None and grid < linear:
+            crossover = n
+        print(f"{n:>6} {linear:>12.2f} {grid:>10.2f}")
+    print(f"交叉点：n >= {crossover} 时网格索引更快" if crossover else "网格索引在所有规模下都不更快")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+stk组件渲染基准测试：在离屏窗口中测量Label、Button、Manu在不同数量下的帧率和每帧耗时
+
+场景：
+    static  每帧整窗重绘，没有事件
+    hover   每帧注入一串MOUSEMOTION事件（悬停风暴）
+    text    长文本，每帧修改一部分组件的文字
+
+结果以JSON输出，便于在不同提交之间比较。
+
+用法：python benchmarks/bench_stk.py [--frames 20] [--sizes 10,1000,10000]
+      [--widgets label,button,manu] [--scenes static,hover,text] [--output result.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from stk import Button, Game, Label, Manu
+
+WIDTH, HEIGHT = 1000, 1000
+CELL_W, CELL_H = 40, 20
+LONG_TEXT = "流程图 flowchart node with a fairly long caption"
+
+def _positions(n: int) -> List[tuple[int, int]]:
+    """按网格排列，超出窗口后从头重叠"""
+    cols, rows = WIDTH // CELL_W, HEIGHT // CELL_H
+    return [((i % cols) * CELL_W, (i // cols % rows) * CELL_H) for i in range(n)]
+
+def make_labels(game: Game, n: int, text: str) -> List[Any]:
+    labels = [Label(game.window, text, CELL_W, CELL_H, x, y, fontsize=14) for x, y in _positions(n)]
+    game.stks = labels
+    return labels
+
+def make_buttons(game: Game, n: int, text: str) -> List[Any]:
+    buttons = [
+        Button(game.window, text, CELL_W, CELL_H, x, y, annotation=text, fontsize=14)
+        for x, y in _positions(n)
+    ]
+    game.stks = buttons
+    return buttons
+
+def make_manu(game: Game, n: int, text: str) -> List[Any]:
+    menu = Manu(
+        game.window,
+        height=CELL_H,
+        button_num=n,
+        button_text=[text] * n,
+        button_width=CELL_W,
+        annotations=[text] * n,
+        fontsize=14
+    )
+    game.stks = [menu]
+    return menu.buttons
+
+WIDGETS: Dict[str, Callable[[Game, int, str], List[Any]]] = {
+    'label': make_labels,
+    'button': make_buttons,
+    'manu': make_manu,
+}
+
+def hover_events(frame: int, count: int) -> List[pygame.event.Event]:
+    """沿对角线往返移动的指针事件"""
+    events = []
+    for i in range(count):
+        t = (frame * count + i) * 7
+        x = t % WIDTH
+        y = (t * 3) % (CELL_H * 3) if i % 2 else t % HEIGHT
+        events.append(pygame.event.Event(pygame.MOUSEMOTION, pos=(x, y), rel=(7, 7), buttons=(0, 0, 0)))
+    return events
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+def run_case(widget: str, n: int, scene: str, frames: int, events: int) -> Dict[str, Any]:
+    """运行一个场景，返回统计结果"""
+    game = Game(headless=True)
+    game.window.update_window((WIDTH, HEIGHT))
+    text = LONG_TEXT if scene == 'text' else "ok"
+    items = WIDGETS[widget](game, n, text)
+    game.window.stk_event(game.stks)
+    pygame.event.clear()
+    game.run(frames=1)  # 预热：字体、文字缓存
+    changed = max(1, min(100, n // 10))
+    times = []
+    for frame in range(frames):
+        if scene == 'hover':
+            for event in hover_events(frame, events):
+                pygame.event.post(event)
+        start = time.perf_counter()
+        if scene == 'text':
+            for i in range(changed):
+                items[(frame * changed + i) % n].set_text(f"{LONG_TEXT} {frame}.{i}")
+        game.run(frames=1)
+        times.append(time.perf_counter() - start)
+    total = sum(times)
+    return {
+        'widget': widget,
+        'count': n,
+        'scene': scene,
+        'frames': frames,
+        'fps': round(frames / total, 2) if total else 0.0,
+        'mean_ms': round(total / frames * 1000, 3),
+        'p50_ms': round(percentile(times, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(times, 0.95) * 1000, 3),
+        'max_ms': round(max(times) * 1000, 3),
+    }
+
+def _commit() -> str|None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--events', type=int, default=50, help="hover场景每帧的事件数")
+    parser.add_argument('--sizes', default='10,1000,10000')
+    parser.add_argument('--widgets', default=','.join(WIDGETS))
+    parser.add_argument('--scenes', default='static,hover,text')
+    parser.add_argument('--output', help="写入JSON文件，默认输出到标准输出")
+    args = parser.parse_args()
+
+    results = []
+    for widget in args.widgets.split(','):
+        for n in (int(size) for size in args.sizes.split(',')):
+            for scene in args.scenes.split(','):
+                result = run_case(widget, n, scene, args.frames, args.events)
+                results.append(result)
+                print(
+                    f"{widget:>6} {n:>6} {scene:>6} {result['fps']:>9.1f}fps "
+                    f"p50 {result['p50_ms']:.2f}ms p95 {result['p95_ms']:.2f}ms",
+                    file=sys.stderr
+                )
+    report = {
+        'commit': _commit(),
+        'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'frames': args.frames,
+        'results': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,4 @@
-"""储存设置"""
\ No newline at end of file
+"""储存设置"""
+
+# 默认的流程图文件
+DEFAULT_FILE = "untitled.fsht"
\ No newline at end of file
@@ -1,3 +1,4 @@
 """游戏的核心"""
 from .app import App # type: ignore
-from .terminal import Terminal # type: ignore
\ No newline at end of file
+from .terminal import Terminal # type: ignore
+from .document import Document, Node, Edge, NodeKind # type: ignore
\ No newline at end of file
@@ -1,35 +1,66 @@
+import os
 import pygame
 import stk
 import utils
+from config import settings
+
+from .document import Document
+from .storage import IncrementalSaver, open_document
+from .autosave import SaveWorker
 
 class App(stk.Game):
     """主程序管理"""
-    def __init__(self , log:utils.LogSystem) -> None:
-        """初始化应用"""
+    def __init__(self , log:utils.LogSystem, headless:bool = False) -> None:
+        """初始化应用，headless为True时离屏渲染且不监听键盘"""
         self.log = log
-        super().__init__()
+        super().__init__(headless)
         self.window.update_window((1000,1000))
         self.window.update_title(title="flowsheet")
-        self.window.add_checks(pygame.QUIT,self._exit)
+        self.dirty_rendering = True
+        # 离屏运行用于批量渲染和导出，不等待输入
+        self.window.set_idle(not headless)
         self.log.log_info("pygame及应用属性初始化成功")
+        self._document_init()
         self._keyboard_init()
         self._stk_init()
         self._eventsystem_init()
 
+    def _document_init(self) -> None:
+        """初始化文档，默认文件存在时打开它，否则新建且第一次保存前不会自动保存"""
+        self.document = Document()
+        self.saver = IncrementalSaver(self.document)
+        if os.path.exists(settings.DEFAULT_FILE):
+            try:
+                self.document, self.saver = open_document(settings.DEFAULT_FILE)
+            except (OSError, ValueError) as e:
+                self.log.log_error(f"打开{settings.DEFAULT_FILE}失败：{e}")
+        self.save_worker = SaveWorker(self.saver, self.log)
+        self.save_worker.start()
+        self.log.log_info("文档初始化成功")
+
     def _keyboard_init(self) -> None:
         """初始化KeyboardHelper"""
         self.keyer = utils.KeyboardHelper()
-        self.keyer.start()
-        self.keyer.add_combo_handler('ctrl','q',handler=self._exit)
+        # 处理函数在主循环中执行，不与绘制并发
+        self.keyer.set_dispatcher(self.window.call_soon)
+        if not self.window.headless:
+            self.keyer.start()
+        self.keyer.add_combo_handler('ctrl','n',handler=self._new)
+        self.keyer.add_combo_handler('ctrl','o',handler=self._open)
+        self.keyer.add_combo_handler('ctrl','s',handler=self._save)
         self.log.log_info("keyboardHelper初始化成功")
 
     def _eventsystem_init(self) -> None:
         """初始化装饰器系统"""
-        utils.EventSystem.bind_app(self)
-        utils.EventSystem.bind_keyboard(self.keyer)
-        utils.EventSystem.bind_log(self.log)
-        utils.EventSystem.register_button('l',self.l)
-        utils.EventSystem.register_menu_buttons('manu',self.menu.buttons)
+        # 每个应用使用自己的事件系统，Ctrl+Q等由装饰器声明的组合键在此绑定到键盘助手
+        self.events = utils.EventSystem()
+        self.events.bind_all(
+            self,
+            self.log,
+            self.keyer,
+            buttons={'l':self.l},
+            menus={'manu':self.menu.buttons}
+        )
         self.log.log_info("装饰器系统绑定成功")
 
     def _stk_init(self) -> None:
@@ -53,22 +84,87 @@ class App(stk.Game):
             fontsize=20,
             annotations=['file(Ctrl+F)','exit(Ctrl+Q)']
         )
+        self.canvas = stk.Canvas(
+            self.window,
+            0,
+            56,
+            800,
+            944,
+            document=self.document,
+            fontname="Microsoft YaHei"
+        )
+        self.minimap = stk.Minimap(self.window, self.canvas, 800, 56, 200, 150)
         self.log.log_info("stk组件初始化成功")
-        self.stks = [self.l,self.menu]
+        self.stks = [self.canvas,self.minimap,self.l,self.menu]
         self.window.stk_event(self.stks)
 
-    def run(self) -> None:
-        """开始程序"""
-        super().run()
+    def _new(self) -> None:
+        """新建文档，第一次保存前不会自动保存"""
+        self._set_document(Document(), None)
+        self.log.log_info("新建文档")
+
+    def _set_document(self, document:Document, saver:IncrementalSaver|None) -> None:
+        """切换当前文档"""
+        if saver is None:
+            saver = IncrementalSaver(document)
+        self.save_worker.bind(saver)
+        self.saver.close()
+        self.document, self.saver = document, saver
+        self.canvas.bind(document)
+        self.minimap.bind(document)
+
+    def _open(self, path:str|None = None) -> None:
+        """打开文件，默认为当前文件"""
+        path = path or self.saver.path or settings.DEFAULT_FILE
+        if not os.path.exists(path):
+            self.log.log_error(f"文件{path}不存在")
+            return
+        try:
+            document, saver = open_document(path)
+        except (OSError, ValueError) as e:
+            self.log.log_error(f"打开{path}失败：{e}")
+            return
+        self._set_document(document, saver)
+        self.log.log_info(f"已打开{path}，共{document.node_count()}个节点")
+
+    def _save(self) -> None:
+        """保存到当前文件"""
+        if self.saver.path is None:
+            self._save_as(settings.DEFAULT_FILE)
+        else:
+            self.save_worker.request()
+
+    def _save_as(self, path:str) -> None:
+        """另存为，在后台线程写入"""
+        self.save_worker.request(path=path)
+
+    def _check(self) -> None:
+        """检测事件并处理后台保存"""
+        super()._check()
+        self.save_worker.update()
+
+    def run(self, frames:int|None = None) -> None:
+        """开始程序，frames不为None时运行指定帧数后退出"""
+        super().run(frames)
+        self.profiler.dump(self.log)
         self._exit()
     
+    @utils.on_combo('ctrl','p',log_message="按下Ctrl+P键")
+    def _toggle_profiler(self) -> None:
+        """显示或隐藏帧耗时叠加层"""
+        self.toggle_profiler()
+
     @utils.on_button('l',"按下按钮“exit”")
     @utils.on_combo('ctrl','q',log_message="按下Ctrl+Q键")
     @utils.on_menu_button('manu',1,"按下按钮“退出”")
     def _exit(self) -> None:
-        """退出程序"""
+        """退出程序，重复调用时不再重复释放资源"""
+        if not self.running:
+            return
         self.running = False
         self.keyer.stop()
+        self.save_worker.stop()
+        self.canvas.close()
 
     # def _draw(self) -> None:
     #     """绘制屏幕"""
@@ -0,0 +1,147 @@
+"""
+后台保存
+主线程只负责取快照，序列化和写盘在工作线程中完成，结果回到主线程后写入日志
+"""
+import queue
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+from .storage import IncrementalSaver, SaveJob, write_job
+
+class SaveWorker:
+    """
+    后台保存线程
+
+    文档修改后等待delay秒再保存，期间的连续修改合并为一次写入；
+    同一时间只有一次写入在进行。update()需要在主循环中定期调用。
+    """
+    def __init__(self, saver: IncrementalSaver, log: Any, delay: float = 2.0, autosave: bool = True) -> None:
+        self.saver = saver
+        self.log = log
+        self.delay = delay
+        self.autosave = autosave
+        self._deadline: Optional[float] = None
+        self._path: Optional[str] = None
+        self._busy = False
+        self._jobs: 'queue.Queue[Optional[SaveJob]]' = queue.Queue()
+        self._results: 'queue.Queue[Tuple[SaveJob, int, Optional[BaseException]]]' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        saver.doc.subscribe(self._on_change)
+
+    def start(self) -> None:
+        """启动工作线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._work, daemon=True, name="SaveWorker")
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """保存未写入的修改并停止工作线程"""
+        self.flush(timeout)
+        if self._thread and self._thread.is_alive():
+            self._jobs.put(None)
+            self._thread.join(timeout=timeout)
+
+    def bind(self, saver: IncrementalSaver) -> None:
+        """切换到另一个文档的保存器（打开文件后调用）"""
+        self.flush()
+        self.saver.doc.unsubscribe(self._on_change)
+        self.saver = saver
+        self._deadline = None
+        saver.doc.subscribe(self._on_change)
+
+    def _on_change(self, change: str, item_id: int, old: Any) -> None:
+        if self.autosave:
+            self.request(self.delay)
+
+    def request(self, delay: float = 0.0, path: Optional[str] = None) -> None:
+        """请求在delay秒后保存，重复请求会推迟到最后一次请求之后"""
+        if path is not None:
+            self._path = path
+        self._deadline = time.monotonic() + delay
+
+    def is_busy(self) -> bool:
+        """是否有保存正在进行或等待进行"""
+        return self._busy or self._deadline is not None
+
+    def update(self) -> None:
+        """在主线程调用：处理完成的保存，到时间后提交新的保存"""
+        self._collect()
+        if self._busy or self._deadline is None or time.monotonic() < self._deadline:
+            return
+        self._submit()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """立即提交待保存的修改并等待写入完成"""
+        end = time.monotonic() + timeout
+        self._collect()
+        if self._deadline is not None:
+            if self._busy:
+                self._wait(end)
+            self._submit()
+        self._wait(end)
+
+    def _submit(self) -> None:
+        """取快照并交给工作线程"""
+        self._deadline = None
+        path, self._path = self._path, None
+        if path is None and (self.saver.path is None or not self.saver.is_modified()):
+            # 没有修改，或是从未保存过的新文档
+            return
+        try:
+            job = self.saver.prepare(path)
+        except ValueError as e:
+            self.log.log_error(f"无法保存：{e}")
+            return
+        self._busy = True
+        if self._thread and self._thread.is_alive():
+            self._jobs.put(job)
+        else:
+            # 线程未启动时直接在当前线程写入
+            self._run(job)
+            self._collect()
+
+    def _wait(self, end: float) -> None:
+        """等待正在进行的写入"""
+        while self._busy:
+            try:
+                result = self._results.get(timeout=max(0.0, end - time.monotonic()))
+            except queue.Empty:
+                self.log.log_error("等待保存超时")
+                return
+            self._finish(*result)
+
+    def _collect(self) -> None:
+        """处理已完成的写入"""
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                return
+            self._finish(*result)
+
+    def _finish(self, job: SaveJob, count: int, error: Optional[BaseException]) -> None:
+        self._busy = False
+        if error is None:
+            self.saver.complete(job, count)
+            kind = "整体保存" if job.compact else "增量保存"
+            self.log.log_info(f"{kind}到{job.path}，写入{count}条记录")
+        else:
+            self.saver.fail(job)
+            self.log.log_error(f"保存到{job.path}失败：{error}")
+
+    def _run(self, job: SaveJob) -> None:
+        try:
+            count = write_job(job)
+        except Exception as e:
+            self._results.put((job, 0, e))
+        else:
+            self._results.put((job, count, None))
+
+    def _work(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            self._run(job)
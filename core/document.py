@@ -0,0 +1,417 @@
+"""
+流程图文档模型
+节点与边按整数ID存放在并行数组中，十万级节点也不会产生大量Python对象
+"""
+import operator
+from array import array
+from enum import IntEnum
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+Rect = Tuple[int, int, int, int]
+Listener = Callable[[str, int, Any], Any]
+
+class NodeKind(IntEnum):
+    """节点类型"""
+    START = 0
+    PROCESS = 1
+    DECISION = 2
+    IO = 3
+    END = 4
+
+class Node(NamedTuple):
+    """节点快照"""
+    id: int
+    kind: NodeKind
+    x: int
+    y: int
+    width: int
+    height: int
+    text: str
+
+class Edge(NamedTuple):
+    """边快照"""
+    id: int
+    src: int
+    dst: int
+    label: str
+
+_INT_MIN = -(1 << 31)
+_INT_MAX = (1 << 31) - 1
+
+def _to_rect(rect: Any) -> Rect:
+    """检查矩形的四个值都是array('i')能存放的整数，先整体检查再写入，避免只改了一半"""
+    x, y, width, height = values = tuple(operator.index(value) for value in rect)
+    for value in values:
+        if not _INT_MIN <= value <= _INT_MAX:
+            raise OverflowError(f"坐标{value}超出范围")
+    return x, y, width, height
+
+def _edge_key(src: int, dst: int) -> int:
+    """把(起点, 终点)压成一个整数作为字典键"""
+    return (src << 32) | dst
+
+class Document:
+    """
+    流程图文档
+
+    节点数据存放在按ID索引的array中，已删除的ID进入空闲表以便复用；
+    邻接表只为有边的节点分配列表。修改后会通知已订阅的监听器：
+    listener(change, item_id, old)，old为节点原矩形或边原(起点, 终点)，新增时为None；
+    clear()后发送('cleared', -1, None)。
+    """
+    def __init__(self) -> None:
+        self._listeners: List[Listener] = []
+        self._reset()
+
+    def _reset(self) -> None:
+        """初始化所有储存"""
+        # 节点
+        self._kind = array('b')
+        self._x = array('i')
+        self._y = array('i')
+        self._w = array('i')
+        self._h = array('i')
+        self._text: List[str] = []
+        self._alive = bytearray()
+        self._free_nodes: Set[int] = set()
+        self._node_count = 0
+        self._out: List[Optional[List[int]]] = []
+        self._in: List[Optional[List[int]]] = []
+        # 边
+        self._src = array('i')
+        self._dst = array('i')
+        self._label: List[str] = []
+        self._edge_alive = bytearray()
+        self._free_edges: Set[int] = set()
+        self._edge_count = 0
+        self._edge_lookup: dict[int, int] = {}
+
+    # 通知
+    def subscribe(self, listener: Listener) -> None:
+        """订阅修改通知"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener) -> None:
+        """取消订阅"""
+        self._listeners.remove(listener)
+
+    def _notify(self, change: str, item_id: int, old: Any = None) -> None:
+        for listener in self._listeners:
+            listener(change, item_id, old)
+
+    # 节点
+    def _check_node(self, node_id: int) -> None:
+        if not self.has_node(node_id):
+            raise KeyError(f"节点{node_id}不存在")
+
+    def _grow_nodes(self) -> int:
+        """在末尾增加一个空节点槽位，返回其ID"""
+        node_id = len(self._alive)
+        self._kind.append(0)
+        for column in (self._x, self._y, self._w, self._h):
+            column.append(0)
+        self._text.append('')
+        self._alive.append(0)
+        self._out.append(None)
+        self._in.append(None)
+        return node_id
+
+    def _alloc_node(self) -> int:
+        """分配节点ID，优先复用已删除的ID"""
+        if self._free_nodes:
+            return self._free_nodes.pop()
+        return self._grow_nodes()
+
+    def add_node(
+            self,
+            kind: NodeKind,
+            x: int,
+            y: int,
+            width: int = 120,
+            height: int = 60,
+            text: str = ''
+        ) -> int:
+        """添加节点，返回ID"""
+        kind, rect = NodeKind(kind), _to_rect((x, y, width, height))
+        return self._put_node(self._alloc_node(), kind, rect, text)
+
+    def restore_node(
+            self,
+            node_id: int,
+            kind: NodeKind,
+            x: int,
+            y: int,
+            width: int,
+            height: int,
+            text: str
+        ) -> None:
+        """按指定ID写入节点（读取文件时使用），已存在时原地更新并保留其边"""
+        kind, rect = NodeKind(kind), _to_rect((x, y, width, height))
+        if self.has_node(node_id):
+            self.set_node_kind(node_id, kind)
+            self.set_node_rect(node_id, rect)
+            self.set_node_text(node_id, text)
+            return
+        while len(self._alive) <= node_id:
+            self._free_nodes.add(self._grow_nodes())
+        self._free_nodes.discard(node_id)
+        self._put_node(node_id, kind, rect, text)
+
+    def _put_node(self, node_id: int, kind: NodeKind, rect: Rect, text: str) -> int:
+        """填写已分配的节点槽位，kind和rect须已检查过"""
+        x, y, width, height = rect
+        self._kind[node_id] = kind
+        self._x[node_id] = x
+        self._y[node_id] = y
+        self._w[node_id] = width
+        self._h[node_id] = height
+        self._text[node_id] = text
+        self._alive[node_id] = 1
+        self._node_count += 1
+        self._notify('node_added', node_id)
+        return node_id
+
+    def remove_node(self, node_id: int) -> None:
+        """删除节点及其相连的边"""
+        self._check_node(node_id)
+        for edge_id in list(self._out[node_id] or ()) + list(self._in[node_id] or ()):
+            if self._edge_alive[edge_id]:
+                self.remove_edge(edge_id)
+        old = self.node_rect(node_id)
+        self._alive[node_id] = 0
+        self._text[node_id] = ''
+        self._out[node_id] = None
+        self._in[node_id] = None
+        self._free_nodes.add(node_id)
+        self._node_count -= 1
+        self._notify('node_removed', node_id, old)
+
+    def move_node(self, node_id: int, x: int, y: int) -> None:
+        """移动节点"""
+        self._check_node(node_id)
+        self.set_node_rect(node_id, (x, y, self._w[node_id], self._h[node_id]))
+
+    def set_node_rect(self, node_id: int, rect: Rect) -> None:
+        """修改节点位置与尺寸"""
+        self._check_node(node_id)
+        rect = _to_rect(rect)
+        old = self.node_rect(node_id)
+        if old == rect:
+            return
+        self._x[node_id], self._y[node_id], self._w[node_id], self._h[node_id] = rect
+        self._notify('node_changed', node_id, old)
+
+    def set_node_text(self, node_id: int, text: str) -> None:
+        """修改节点文字"""
+        self._check_node(node_id)
+        if self._text[node_id] != text:
+            self._text[node_id] = text
+            self._notify('node_changed', node_id, self.node_rect(node_id))
+
+    def set_node_kind(self, node_id: int, kind: NodeKind) -> None:
+        """修改节点类型"""
+        self._check_node(node_id)
+        if self._kind[node_id] != kind:
+            self._kind[node_id] = NodeKind(kind)
+            self._notify('node_changed', node_id, self.node_rect(node_id))
+
+    def has_node(self, node_id: int) -> bool:
+        """节点是否存在"""
+        return 0 <= node_id < len(self._alive) and self._alive[node_id] == 1
+
+    def node_kind(self, node_id: int) -> NodeKind:
+        """返回节点类型"""
+        self._check_node(node_id)
+        return NodeKind(self._kind[node_id])
+
+    def node_rect(self, node_id: int) -> Rect:
+        """返回节点矩形(x, y, 宽, 高)"""
+        self._check_node(node_id)
+        return (self._x[node_id], self._y[node_id], self._w[node_id], self._h[node_id])
+
+    def node_text(self, node_id: int) -> str:
+        """返回节点文字"""
+        self._check_node(node_id)
+        return self._text[node_id]
+
+    def get_node(self, node_id: int) -> Node:
+        """返回节点快照"""
+        return Node(node_id, self.node_kind(node_id), *self.node_rect(node_id), self._text[node_id])
+
+    def node_ids(self) -> Iterator[int]:
+        """遍历所有节点ID"""
+        alive = self._alive
+        return (i for i in range(len(alive)) if alive[i])
+
+    def node_count(self) -> int:
+        """节点数量"""
+        return self._node_count
+
+    # 边
+    def _check_edge(self, edge_id: int) -> None:
+        if not self.has_edge(edge_id):
+            raise KeyError(f"边{edge_id}不存在")
+
+    def _grow_edges(self) -> int:
+        """在末尾增加一个空边槽位，返回其ID"""
+        edge_id = len(self._edge_alive)
+        self._src.append(0)
+        self._dst.append(0)
+        self._label.append('')
+        self._edge_alive.append(0)
+        return edge_id
+
+    def add_edge(self, src: int, dst: int, label: str = '') -> int:
+        """添加有向边，返回ID；同一对节点之间只允许一条同向的边"""
+        self._check_node(src)
+        self._check_node(dst)
+        if _edge_key(src, dst) in self._edge_lookup:
+            raise ValueError(f"节点{src}到{dst}的边已存在")
+        if self._free_edges:
+            edge_id = self._free_edges.pop()
+        else:
+            edge_id = self._grow_edges()
+        return self._put_edge(edge_id, src, dst, label)
+
+    def restore_edge(self, edge_id: int, src: int, dst: int, label: str) -> None:
+        """按指定ID写入边（读取文件时使用），会替换该ID或同端点的旧边"""
+        self._check_node(src)
+        self._check_node(dst)
+        if self.has_edge(edge_id):
+            if self.edge_endpoints(edge_id) == (src, dst):
+                self.set_edge_label(edge_id, label)
+                return
+            self.remove_edge(edge_id)
+        other = self.edge_between(src, dst)
+        if other is not None:
+            self.remove_edge(other)
+        while len(self._edge_alive) <= edge_id:
+            self._free_edges.add(self._grow_edges())
+        self._free_edges.discard(edge_id)
+        self._put_edge(edge_id, src, dst, label)
+
+    def _put_edge(self, edge_id: int, src: int, dst: int, label: str) -> int:
+        """填写已分配的边槽位"""
+        key = _edge_key(src, dst)
+        self._src[edge_id] = src
+        self._dst[edge_id] = dst
+        self._label[edge_id] = label
+        self._edge_alive[edge_id] = 1
+        self._edge_count += 1
+        self._edge_lookup[key] = edge_id
+        out = self._out[src]
+        if out is None:
+            out = self._out[src] = []
+        out.append(edge_id)
+        incoming = self._in[dst]
+        if incoming is None:
+            incoming = self._in[dst] = []
+        incoming.append(edge_id)
+        self._notify('edge_added', edge_id)
+        return edge_id
+
+    def remove_edge(self, edge_id: int) -> None:
+        """删除边"""
+        self._check_edge(edge_id)
+        src, dst = self._src[edge_id], self._dst[edge_id]
+        del self._edge_lookup[_edge_key(src, dst)]
+        out = self._out[src]
+        incoming = self._in[dst]
+        if out is not None:
+            out.remove(edge_id)
+            if not out:
+                self._out[src] = None
+        if incoming is not None:
+            incoming.remove(edge_id)
+            if not incoming:
+                self._in[dst] = None
+        self._edge_alive[edge_id] = 0
+        self._label[edge_id] = ''
+        self._free_edges.add(edge_id)
+        self._edge_count -= 1
+        self._notify('edge_removed', edge_id, (src, dst))
+
+    def set_edge_label(self, edge_id: int, label: str) -> None:
+        """修改边的文字"""
+        self._check_edge(edge_id)
+        if self._label[edge_id] != label:
+            self._label[edge_id] = label
+            self._notify('edge_changed', edge_id, self.edge_endpoints(edge_id))
+
+    def has_edge(self, edge_id: int) -> bool:
+        """边是否存在"""
+        return 0 <= edge_id < len(self._edge_alive) and self._edge_alive[edge_id] == 1
+
+    def edge_between(self, src: int, dst: int) -> Optional[int]:
+        """返回从src到dst的边ID，不存在时返回None"""
+        return self._edge_lookup.get(_edge_key(src, dst))
+
+    def edge_endpoints(self, edge_id: int) -> Tuple[int, int]:
+        """返回边的(起点, 终点)"""
+        self._check_edge(edge_id)
+        return (self._src[edge_id], self._dst[edge_id])
+
+    def edge_label(self, edge_id: int) -> str:
+        """返回边的文字"""
+        self._check_edge(edge_id)
+        return self._label[edge_id]
+
+    def get_edge(self, edge_id: int) -> Edge:
+        """返回边快照"""
+        return Edge(edge_id, *self.edge_endpoints(edge_id), self._label[edge_id])
+
+    def out_edges(self, node_id: int) -> List[int]:
+        """返回从节点出发的边"""
+        self._check_node(node_id)
+        return list(self._out[node_id] or ())
+
+    def in_edges(self, node_id: int) -> List[int]:
+        """返回指向节点的边"""
+        self._check_node(node_id)
+        return list(self._in[node_id] or ())
+
+    def successors(self, node_id: int) -> List[int]:
+        """返回后继节点"""
+        return [self._dst[e] for e in self.out_edges(node_id)]
+
+    def predecessors(self, node_id: int) -> List[int]:
+        """返回前驱节点"""
+        return [self._src[e] for e in self.in_edges(node_id)]
+
+    def edge_ids(self) -> Iterator[int]:
+        """遍历所有边ID"""
+        alive = self._edge_alive
+        return (i for i in range(len(alive)) if alive[i])
+
+    def edge_count(self) -> int:
+        """边数量"""
+        return self._edge_count
+
+    def snapshot(self) -> 'Document':
+        """返回不带监听器的独立副本，供其他线程读取"""
+        copy = Document.__new__(Document)
+        copy._listeners = []
+        copy._kind = array('b', self._kind)
+        copy._x = array('i', self._x)
+        copy._y = array('i', self._y)
+        copy._w = array('i', self._w)
+        copy._h = array('i', self._h)
+        copy._text = self._text.copy()
+        copy._alive = bytearray(self._alive)
+        copy._free_nodes = self._free_nodes.copy()
+        copy._node_count = self._node_count
+        copy._out = [None if ids is None else ids.copy() for ids in self._out]
+        copy._in = [None if ids is None else ids.copy() for ids in self._in]
+        copy._src = array('i', self._src)
+        copy._dst = array('i', self._dst)
+        copy._label = self._label.copy()
+        copy._edge_alive = bytearray(self._edge_alive)
+        copy._free_edges = self._free_edges.copy()
+        copy._edge_count = self._edge_count
+        copy._edge_lookup = self._edge_lookup.copy()
+        return copy
+
+    def clear(self) -> None:
+        """清空文档，监听器保留并收到'cleared'通知"""
+        self._reset()
+        self._notify('cleared', -1)
@@ -0,0 +1,318 @@
+"""
+流程图文件读写
+文件由文件头和一串带长度前缀的二进制记录组成，可以边读边写；
+保存时只追加上次保存以来修改过的节点和边，记录过多时整体重写（压缩）。
+"""
+import os
+import struct
+from typing import BinaryIO, Dict, Iterable, Iterator, NamedTuple, Optional, Set, Tuple, Union
+
+from .document import Document, Edge, Node, NodeKind
+
+MAGIC = b'FSHT'
+VERSION = 1
+HEADER = MAGIC + bytes([VERSION])
+
+# 记录类型
+NODE = 1
+EDGE = 2
+NODE_DELETED = 3
+EDGE_DELETED = 4
+
+_RECORD = struct.Struct('<BI')        # 类型, 数据长度
+_NODE = struct.Struct('<Ibiiii')      # ID, 类型, x, y, 宽, 高 + 文字
+_EDGE = struct.Struct('<III')         # ID, 起点, 终点 + 文字
+_ID = struct.Struct('<I')
+
+class FlowFileError(ValueError):
+    """文件格式错误"""
+
+def _record(kind: int, payload: bytes) -> bytes:
+    return _RECORD.pack(kind, len(payload)) + payload
+
+def node_record(doc: 'Document|ChangeSnapshot', node_id: int) -> bytes:
+    """节点记录，节点已删除时为删除记录"""
+    if not doc.has_node(node_id):
+        return _record(NODE_DELETED, _ID.pack(node_id))
+    node = doc.get_node(node_id)
+    return _record(
+        NODE,
+        _NODE.pack(node_id, node.kind, node.x, node.y, node.width, node.height) + node.text.encode('utf-8')
+    )
+
+def edge_record(doc: 'Document|ChangeSnapshot', edge_id: int) -> bytes:
+    """边记录，边已删除时为删除记录"""
+    if not doc.has_edge(edge_id):
+        return _record(EDGE_DELETED, _ID.pack(edge_id))
+    edge = doc.get_edge(edge_id)
+    return _record(EDGE, _EDGE.pack(edge_id, edge.src, edge.dst) + edge.label.encode('utf-8'))
+
+def iter_document(doc: Document) -> Iterator[bytes]:
+    """逐条生成整个文档的记录"""
+    for node_id in doc.node_ids():
+        yield node_record(doc, node_id)
+    for edge_id in doc.edge_ids():
+        yield edge_record(doc, edge_id)
+
+def iter_changes(doc: 'Document|ChangeSnapshot', nodes: Iterable[int], edges: Iterable[int]) -> Iterator[bytes]:
+    """
+    逐条生成指定节点和边的记录
+    顺序为：删除的边、删除的节点、节点、边，保证重放时端点总是存在
+    """
+    nodes = sorted(nodes)
+    edges = sorted(edges)
+    for edge_id in edges:
+        if not doc.has_edge(edge_id):
+            yield edge_record(doc, edge_id)
+    for node_id in nodes:
+        if not doc.has_node(node_id):
+            yield node_record(doc, node_id)
+    for node_id in nodes:
+        if doc.has_node(node_id):
+            yield node_record(doc, node_id)
+    for edge_id in edges:
+        if doc.has_edge(edge_id):
+            yield edge_record(doc, edge_id)
+
+def write_records(file: BinaryIO, records: Iterable[bytes], buffer_size: int = 1 << 16) -> int:
+    """分批写入记录，返回写入的记录数"""
+    count = 0
+    chunk = []
+    size = 0
+    for record in records:
+        chunk.append(record)
+        size += len(record)
+        count += 1
+        if size >= buffer_size:
+            file.write(b''.join(chunk))
+            chunk.clear()
+            size = 0
+    if chunk:
+        file.write(b''.join(chunk))
+    return count
+
+def read_records(file: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    """逐条读取记录；末尾不完整的记录（例如写入中断）会被忽略"""
+    if file.read(len(HEADER)) != HEADER:
+        raise FlowFileError("不是flowsheet文件或版本不受支持")
+    while True:
+        head = file.read(_RECORD.size)
+        if len(head) < _RECORD.size:
+            return
+        kind, length = _RECORD.unpack(head)
+        payload = file.read(length)
+        if len(payload) < length:
+            return
+        yield kind, payload
+
+def apply_record(doc: Document, kind: int, payload: bytes) -> None:
+    """把一条记录应用到文档，记录损坏（长度不对、端点不存在、文字无法解码等）时抛出FlowFileError"""
+    try:
+        _apply_record(doc, kind, payload)
+    except FlowFileError:
+        raise
+    except (struct.error, KeyError, ValueError) as e:
+        raise FlowFileError(f"记录损坏：{e}") from e
+
+def _apply_record(doc: Document, kind: int, payload: bytes) -> None:
+    if kind == NODE:
+        node_id, node_kind, x, y, w, h = _NODE.unpack_from(payload)
+        text = payload[_NODE.size:].decode('utf-8')
+        doc.restore_node(node_id, NodeKind(node_kind), x, y, w, h, text)
+    elif kind == EDGE:
+        edge_id, src, dst = _EDGE.unpack_from(payload)
+        doc.restore_edge(edge_id, src, dst, payload[_EDGE.size:].decode('utf-8'))
+    elif kind == NODE_DELETED:
+        node_id, = _ID.unpack(payload)
+        if doc.has_node(node_id):
+            doc.remove_node(node_id)
+    elif kind == EDGE_DELETED:
+        edge_id, = _ID.unpack(payload)
+        if doc.has_edge(edge_id):
+            doc.remove_edge(edge_id)
+    else:
+        raise FlowFileError(f"未知的记录类型{kind}")
+
+def load_document(path: str, doc: Optional[Document] = None) -> Document:
+    """读取文件，按顺序重放所有记录"""
+    if doc is None:
+        doc = Document()
+    with open(path, 'rb') as file:
+        for kind, payload in read_records(file):
+            apply_record(doc, kind, payload)
+    return doc
+
+def write_document(doc: Document, path: str) -> int:
+    """把整个文档写入临时文件后替换目标文件，返回记录数"""
+    return write_file(path, iter_document(doc))
+
+def write_file(path: str, records: Iterable[bytes]) -> int:
+    """把记录写入临时文件后原子地替换目标文件，返回记录数"""
+    tmp = path + '.tmp'
+    try:
+        with open(tmp, 'wb') as file:
+            file.write(HEADER)
+            count = write_records(file, records)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return count
+
+def append_file(path: str, records: Iterable[bytes]) -> int:
+    """把记录追加到已有文件末尾，返回记录数"""
+    with open(path, 'ab') as file:
+        count = write_records(file, records)
+        file.flush()
+        os.fsync(file.fileno())
+    return count
+
+class ChangeSnapshot:
+    """增量保存用的快照，只包含修改过的节点和边（已删除的为None）"""
+    def __init__(self, doc: Document, nodes: Iterable[int], edges: Iterable[int]) -> None:
+        self.nodes: Dict[int, Optional[Node]] = {
+            i: doc.get_node(i) if doc.has_node(i) else None for i in nodes
+        }
+        self.edges: Dict[int, Optional[Edge]] = {
+            i: doc.get_edge(i) if doc.has_edge(i) else None for i in edges
+        }
+
+    def has_node(self, node_id: int) -> bool:
+        return self.nodes.get(node_id) is not None
+
+    def get_node(self, node_id: int) -> Node:
+        node = self.nodes[node_id]
+        if node is None:
+            raise KeyError(f"节点{node_id}不存在")
+        return node
+
+    def has_edge(self, edge_id: int) -> bool:
+        return self.edges.get(edge_id) is not None
+
+    def get_edge(self, edge_id: int) -> Edge:
+        edge = self.edges[edge_id]
+        if edge is None:
+            raise KeyError(f"边{edge_id}不存在")
+        return edge
+
+class SaveJob(NamedTuple):
+    """一次保存：compact为True时data是整个文档的快照，否则是ChangeSnapshot"""
+    path: str
+    compact: bool
+    data: Union[Document, ChangeSnapshot]
+
+def write_job(job: SaveJob) -> int:
+    """执行保存的磁盘写入部分，可以在其他线程调用，返回记录数"""
+    if job.compact:
+        return write_document(job.data, job.path)  # type: ignore
+    data = job.data
+    return append_file(job.path, iter_changes(data, data.nodes, data.edges))  # type: ignore
+
+class IncrementalSaver:
+    """
+    跟踪文档修改并增量保存
+    文件中的记录数超过compact_ratio倍的现存对象数时，下一次保存会整体重写文件。
+    """
+    def __init__(self, doc: Document, path: Optional[str] = None, compact_ratio: float = 2.0) -> None:
+        self.doc = doc
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.file_records = 0
+        self._nodes: Set[int] = set()
+        self._edges: Set[int] = set()
+        self._full = True
+        doc.subscribe(self._on_change)
+
+    def _on_change(self, change: str, item_id: int, old: object) -> None:
+        if change.startswith('node'):
+            self._nodes.add(item_id)
+        elif change.startswith('edge'):
+            self._edges.add(item_id)
+        else:
+            self._full = True
+
+    def close(self) -> None:
+        """停止跟踪"""
+        self.doc.unsubscribe(self._on_change)
+
+    def mark_saved(self, path: str, records: int) -> None:
+        """记录文件已与文档一致（例如刚从该文件读取）"""
+        self.path = path
+        self.file_records = records
+        self._nodes.clear()
+        self._edges.clear()
+        self._full = False
+
+    def is_modified(self) -> bool:
+        """是否有未保存的修改"""
+        return self._full or bool(self._nodes) or bool(self._edges)
+
+    def needs_compaction(self) -> bool:
+        """下一次保存是否需要整体重写"""
+        if self._full or self.path is None or not os.path.exists(self.path):
+            return True
+        live = self.doc.node_count() + self.doc.edge_count()
+        pending = len(self._nodes) + len(self._edges)
+        return self.file_records + pending > max(1024, self.compact_ratio * live)
+
+    def take_changes(self) -> Tuple[Set[int], Set[int]]:
+        """取出并清空修改过的节点和边"""
+        nodes, edges = self._nodes, self._edges
+        self._nodes, self._edges = set(), set()
+        self._full = False
+        return nodes, edges
+
+    def prepare(self, path: Optional[str] = None) -> SaveJob:
+        """在主线程取出修改并生成快照，之后的写入可以交给其他线程"""
+        if path is not None and path != self.path:
+            self.path = path
+            self._full = True
+        if self.path is None:
+            raise ValueError("没有指定保存路径")
+        compact = self.needs_compaction()
+        nodes, edges = self.take_changes()
+        if compact:
+            return SaveJob(self.path, True, self.doc.snapshot())
+        return SaveJob(self.path, False, ChangeSnapshot(self.doc, nodes, edges))
+
+    def complete(self, job: SaveJob, count: int) -> None:
+        """保存成功后更新文件中的记录数"""
+        if job.compact:
+            self.file_records = count
+        else:
+            self.file_records += count
+
+    def fail(self, job: SaveJob) -> None:
+        """保存失败：修改没有写入，且文件末尾可能留下半条记录，下次整体重写"""
+        self._full = True
+
+    def save(self, path: Optional[str] = None) -> int:
+        """在当前线程保存到文件，返回写入的记录数"""
+        job = self.prepare(path)
+        try:
+            count = write_job(job)
+        except BaseException:
+            self.fail(job)
+            raise
+        self.complete(job, count)
+        return count
+
+def open_document(path: str) -> Tuple[Document, IncrementalSaver]:
+    """读取文件并返回文档及与之同步的保存器"""
+    doc = Document()
+    records = 0
+    size = len(HEADER)
+    with open(path, 'rb') as file:
+        for kind, payload in read_records(file):
+            apply_record(doc, kind, payload)
+            records += 1
+            size += _RECORD.size + len(payload)
+    saver = IncrementalSaver(doc)
+    saver.mark_saved(path, records)
+    if size != os.path.getsize(path):
+        # 末尾有不完整的记录，不能在其后追加
+        saver._full = True
+    return doc, saver
@@ -15,7 +15,7 @@ class Terminal:
             os.mkdir("logs")
             self.logs_huan = "logs文件夹不存在，已自动创建"
         self.log_file =  open(f"logs/{time.strftime("%Y.%m.%d-%H.%M.%S")}.log",'a',encoding="utf-8")
-        self.log = LogSystem(self.log_file)
+        self.log = LogSystem(self.log_file, buffered=True)
         self.log.log_info(self.logs_huan)
         try:
             colorama.init(autoreset=True)
@@ -46,5 +46,6 @@ class Terminal:
                 print(f"ERROR:{e}")
             self.log.log_error(f"发生错误：{e}")
         finally:
+            self.log.close()
             self.log_file.close()
         sys.exit(0)
\ No newline at end of file
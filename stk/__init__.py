@@ -1,7 +1,15 @@
 """管理包"""
+from .font import *
+from .textcache import *
+from .spatial import *
+from .profiler import *
+from .lod import *
+from .tiles import *
 from .label import *
 from .button import *
 from .manu import *
+from .canvas import *
+from .minimap import *
 from .win import *
 
 __version__ = '0.0.4'
\ No newline at end of file
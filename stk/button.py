@@ -2,6 +2,7 @@ import pygame
 from typing import Callable, Any
 
 from .label import Label
+from .textcache import render_text
 
 def kong():
     pass
@@ -51,29 +52,81 @@ class Button(Label):
         self.fontsize = fontsize
         self.fontname = fontname
         self.time = 0
+        self.label: Label|None = None
+        # 各状态预先渲染的外观，样式改变时失效
+        self._surfaces: dict[str, pygame.Surface] = {}
+        self._surface_key: tuple = ()
+        self._text_overflows = False
         
     def _collidepoint(self, pos: tuple[int, int]) -> bool:
         """检测是否碰撞"""
         return self.rect.collidepoint(pos)
     
+    def get_events(self) -> tuple[int, ...]:
+        """返回需要接收的事件类型"""
+        return (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+
+    def get_bounds(self) -> pygame.Rect:
+        """返回绘制区域（按下时的加粗边框、超出按钮的文字及显示中的注释）"""
+        bounds = self._frame_rect().union(self._text_rect())
+        tooltip = self._tooltip_bounds()
+        if tooltip is not None:
+            bounds.union_ip(tooltip)
+        return bounds
+
+    def _frame_rect(self) -> pygame.Rect:
+        """返回包含按下时加粗边框的按钮区域"""
+        return self.rect.inflate(
+            2 * (self.original_border + 2),
+            2 * (self.original_border + 2)
+        )
+
+    def _text_rect(self) -> pygame.Rect:
+        """文字在窗口中的区域，可能超出按钮"""
+        text_surf = render_text(self.font, self.text, True, self.foreground)
+        return text_surf.get_rect(center=self.rect.center)
+
+    def _tooltip_bounds(self) -> pygame.Rect|None:
+        """返回正在显示的注释区域"""
+        if self.is_hovered and self.time >= 3 and self.label is not None:
+            return self.label.get_bounds()
+        return None
+
     def check(self, event: pygame.event.Event) -> None:
         """处理按钮事件"""
+        state = (self.is_hovered, self.is_pressed)
+        tooltip = self._tooltip_bounds()
+        self._handle(event)
+        if state != (self.is_hovered, self.is_pressed):
+            self.mark_dirty(self._frame_rect())
+        new_tooltip = self._tooltip_bounds()
+        if tooltip != new_tooltip:
+            if tooltip is not None:
+                self.mark_dirty(tooltip)
+            if new_tooltip is not None:
+                self.mark_dirty(new_tooltip)
+
+    def _handle(self, event: pygame.event.Event) -> None:
+        """更新按钮状态"""
         if event.type == pygame.MOUSEMOTION:
             self.is_hovered = self._collidepoint(event.pos)
             self.pos = event.pos
             if self.is_hovered and self.annotation:
-                self.label = Label(
-                    self.win,
-                    self.annotation,
-                    len(self.annotation) * 8,
-                    16, 
-                    self.pos[0], 
-                    self.pos[1],
-                    background=(255,255,245),
-                    bordercolor=(150,150,150),
-                    fontname=self.fontname,
-                    fontsize=16
-                )
+                if self.label is None or self.label.text != self.annotation:
+                    self.label = Label(
+                        self.win,
+                        self.annotation,
+                        len(self.annotation) * 8,
+                        16, 
+                        self.pos[0], 
+                        self.pos[1],
+                        background=(255,255,245),
+                        bordercolor=(150,150,150),
+                        fontname=self.fontname,
+                        fontsize=16
+                    )
+                else:
+                    self.label.goto(self.pos)
                 self.time += 1
             else:
                 self.time = 0
@@ -89,31 +142,82 @@ class Button(Label):
             self.is_pressed = False
             self.border = self.original_border
     
-    def draw(self) -> None:
-        """绘制按钮"""
-        if self.is_pressed:
-            current_bg = self.press_background
-        elif self.is_hovered:
-            current_bg = self.hover_background
-        else:
-            current_bg = self.original_background
-        
-        self.background = current_bg
-        self.border_rect = pygame.Rect(
-            self.x - self.border, 
-            self.y - self.border, 
-            self.width + 2 * self.border, 
-            self.height + 2 * self.border
+    def _style_key(self) -> tuple:
+        """影响外观的属性，任何一项改变都需要重新渲染"""
+        return (
+            self.text,
+            self.width,
+            self.height,
+            self.original_border,
+            self.foreground,
+            self.original_background,
+            self.hover_background,
+            self.press_background,
+            self.bordercolor,
+            self.font
         )
-        super().draw()
 
-        if self.is_pressed:
-            overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+    def _render_state(self, state: str) -> pygame.Surface:
+        """渲染一种状态（normal/hover/pressed）的外观，包含边框"""
+        border = self.original_border + 2 if state == 'pressed' else self.original_border
+        background = {
+            'normal': self.original_background,
+            'hover': self.hover_background,
+            'pressed': self.press_background
+        }[state]
+        surf = pygame.Surface((self.width + 2 * border, self.height + 2 * border))
+        inner = pygame.Rect(border, border, self.width, self.height)
+        if border > 0:
+            surf.fill(self.bordercolor)
+        surf.fill(background, inner)
+        text_surf = render_text(self.font, self.text, True, self.foreground)
+        surf.blit(text_surf, text_surf.get_rect(center=inner.center))
+        if state == 'pressed':
+            overlay = pygame.Surface(inner.size, pygame.SRCALPHA)
             overlay.fill((0, 0, 0, 50))
-            self.win.get_window().blit(overlay, (self.x, self.y))
+            surf.blit(overlay, inner)
+        self._surfaces[state] = surf
+        return surf
+
+    def draw(self) -> None:
+        """绘制按钮：只需贴上当前状态预先渲染好的外观"""
+        key = self._style_key()
+        if key != self._surface_key:
+            self._surfaces.clear()
+            self._surface_key = key
+            text_w, text_h = self.font.size(self.text)
+            self._text_overflows = text_w > self.width or text_h > self.height
+        if self.is_pressed:
+            state = 'pressed'
+            border = self.original_border + 2
+            self.background = self.press_background
+        else:
+            state = 'hover' if self.is_hovered else 'normal'
+            border = self.original_border
+            self.background = self.hover_background if self.is_hovered else self.original_background
+        surf = self._surfaces.get(state) or self._render_state(state)
+        self.win.get_window().blit(surf, (self.x - border, self.y - border))
+        if self._text_overflows:
+            self._draw_overflow(surf.get_rect(topleft=(self.x - border, self.y - border)))
         self.label_draw()
 
+    def _draw_overflow(self, frame: pygame.Rect) -> None:
+        """文字比按钮大时，把超出外框的部分直接画到窗口上（与逐项绘制时相同）"""
+        text_surf = render_text(self.font, self.text, True, self.foreground)
+        text = text_surf.get_rect(center=self.rect.center)
+        left, right = max(text.left, frame.left), min(text.right, frame.right)
+        pieces = [
+            pygame.Rect(text.left, text.top, frame.left - text.left, text.height),
+            pygame.Rect(frame.right, text.top, text.right - frame.right, text.height),
+            pygame.Rect(left, text.top, right - left, frame.top - text.top),
+            pygame.Rect(left, frame.bottom, right - left, text.bottom - frame.bottom)
+        ]
+        screen = self.win.get_window()
+        for piece in pieces:
+            if piece.width > 0 and piece.height > 0:
+                screen.blit(text_surf, piece, piece.move(-text.x, -text.y))
+
     def label_draw(self) -> None:
         """绘制标签"""
-        if self.is_hovered and self.time >= 3:
+        if self.is_hovered and self.time >= 3 and self.label is not None:
             self.label.draw()
\ No newline at end of file
@@ -0,0 +1,559 @@
+"""画布模块"""
+import math
+import pygame
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .win import Windows
+from .spatial import GridIndex
+from .font import get_font
+from .textcache import render_text
+from .lod import LOD_BOX, LOD_DENSITY, LOD_FULL, DensityPyramid
+from .tiles import TileCache, TileKey, TileWorker, tile_range, tile_world_rect
+
+Color = Tuple[int, int, int]
+Point = Tuple[float, float]
+# 绘制所需数据的快照：边（两端中心的世界坐标）和节点（世界坐标矩形, 类型, 文字）
+Scene = Tuple[List[Tuple[Point, Point]], List[Tuple[pygame.Rect, int, str]]]
+
+# 节点类型（与core.NodeKind的值一致）对应的填充色
+NODE_COLORS: Dict[int, Color] = {
+    0: (200, 235, 200),  # 开始
+    1: (235, 235, 250),  # 处理
+    2: (250, 240, 200),  # 判断
+    3: (220, 240, 250),  # 输入输出
+    4: (240, 210, 210),  # 结束
+}
+
+class Canvas:
+    """
+    流程图画布
+
+    document只需提供 node_ids/node_rect/node_kind/node_text、
+    edge_ids/edge_endpoints/out_edges/in_edges 及 subscribe/unsubscribe（如core.Document）。
+    节点和边按世界坐标放入空间索引，绘制时只查询与视口相交的部分，
+    耗时取决于可见内容而不是文档大小。左键拖动平移，滚轮缩放。
+
+    tile_budget_mb大于0时，内容按缩放级别切成世界坐标瓦片缓存，平移时主要是瓦片的blit；
+    文档修改只使包含该节点或边的瓦片失效。prefetch为视口外预先渲染的瓦片圈数，
+    这些瓦片在后台线程中渲染，所需数据在主线程中取好快照，不直接访问文档。
+
+    细节层次随缩放变化：zoom不小于text_zoom时画节点外形和文字，不小于box_zoom时只画矩形，
+    再小时画按网格聚合的密度块（每块不小于block_size像素），耗时与文档大小无关。
+    """
+    def __init__(self,
+                 win: Windows,
+                 x: int,
+                 y: int,
+                 width: int,
+                 height: int,
+                 document: Any = None,
+                 background: Color = (255, 255, 255),
+                 foreground: Color = (0, 0, 0),
+                 edgecolor: Color = (90, 90, 90),
+                 densitycolor: Color = (70, 90, 140),
+                 fontname: str = "Arial",
+                 fontsize: int = 16,
+                 min_zoom: float = 0.02,
+                 max_zoom: float = 8.0,
+                 cell_size: int = 256,
+                 tile_budget_mb: float = 64,
+                 prefetch: int = 1,
+                 text_zoom: float = 0.4,
+                 box_zoom: float = 0.1,
+                 block_size: int = 8
+                 ) -> None:
+        """初始化画布"""
+        self.win = win
+        self.rect = pygame.Rect(x, y, width, height)
+        self.background = background
+        self.foreground = foreground
+        self.edgecolor = edgecolor
+        self.densitycolor = densitycolor
+        self.fontname = fontname
+        self.fontsize = fontsize
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        if box_zoom > text_zoom:
+            raise ValueError("box_zoom不能大于text_zoom")
+        self.text_zoom = text_zoom
+        self.box_zoom = box_zoom
+        self.block_size = block_size
+        # 视口左上角的世界坐标及缩放倍数
+        self.view_x = 0.0
+        self.view_y = 0.0
+        self.zoom = 1.0
+        self._nodes = GridIndex(cell_size)
+        self._edges = GridIndex(cell_size)
+        self._density = DensityPyramid()
+        self._density_key: Optional[Tuple[Any, ...]] = None
+        self._density_surface: Optional[pygame.Surface] = None
+        self._density_palette: List[Color] = []
+        self._drag: Optional[Tuple[int, int]] = None
+        self.tiles = TileCache(tile_budget_mb) if tile_budget_mb > 0 else None
+        self.prefetch = prefetch
+        self._worker = TileWorker() if self.tiles is not None and prefetch > 0 else None
+        self._heading = (0.0, 0.0)  # 最近一次平移的方向，优先预取前方的瓦片
+        self._prefetched: Optional[Tuple[Any, ...]] = None
+        self._view_listeners: List[Callable[[], None]] = []
+        self.document: Any = None
+        if document is not None:
+            self.bind(document)
+
+    # 文档
+    def bind(self, document: Any) -> None:
+        """显示另一个文档"""
+        if self.document is not None:
+            self.document.unsubscribe(self._on_change)
+        self.document = document
+        self._rebuild()
+        document.subscribe(self._on_change)
+
+    def unbind(self) -> None:
+        """停止显示文档"""
+        if self.document is not None:
+            self.document.unsubscribe(self._on_change)
+            self.document = None
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """重建空间索引"""
+        self._nodes.clear()
+        self._edges.clear()
+        self._density.clear()
+        self._density_key = None
+        doc = self.document
+        if doc is not None:
+            for node_id in doc.node_ids():
+                self._nodes.insert(node_id, doc.node_rect(node_id))
+                self._density.add(self._nodes.get_rect(node_id))
+            for edge_id in doc.edge_ids():
+                self._edges.insert(edge_id, self._edge_rect(edge_id))
+        if self.tiles is not None:
+            self.tiles.clear()
+        self.mark_dirty()
+
+    def close(self) -> None:
+        """停止后台渲染线程"""
+        if self._worker is not None:
+            self._worker.stop()
+
+    def _edge_rect(self, edge_id: int) -> pygame.Rect:
+        """边（两端节点中心连线）的世界坐标外接矩形"""
+        src, dst = self.document.edge_endpoints(edge_id)
+        (x0, y0), (x1, y1) = self._nodes.get_rect(src).center, self._nodes.get_rect(dst).center
+        return pygame.Rect(min(x0, x1), min(y0, y1), abs(x1 - x0) + 1, abs(y1 - y0) + 1)
+
+    def _on_change(self, change: str, item_id: int, old: Any) -> None:
+        """根据文档修改更新索引，并只重绘受影响的区域"""
+        doc = self.document
+        if change == 'node_added':
+            self._nodes.insert(item_id, doc.node_rect(item_id))
+            self._density.add(self._nodes.get_rect(item_id))
+            self._patch_density(self._nodes.get_rect(item_id))
+            self._invalidate(self._nodes.get_rect(item_id))
+        elif change == 'node_changed':
+            self._invalidate(pygame.Rect(old))
+            self._density.remove(old)
+            self._nodes.move(item_id, doc.node_rect(item_id))
+            self._density.add(self._nodes.get_rect(item_id))
+            self._patch_density(old)
+            self._patch_density(self._nodes.get_rect(item_id))
+            self._invalidate(self._nodes.get_rect(item_id))
+            for edge_id in doc.out_edges(item_id) + doc.in_edges(item_id):
+                self._invalidate(self._edges.get_rect(edge_id))
+                self._edges.move(edge_id, self._edge_rect(edge_id))
+                self._invalidate(self._edges.get_rect(edge_id))
+        elif change == 'node_removed':
+            self._nodes.remove(item_id)
+            self._density.remove(old)
+            self._patch_density(old)
+            self._invalidate(pygame.Rect(old))
+        elif change == 'edge_added':
+            self._edges.insert(item_id, self._edge_rect(item_id))
+            self._invalidate(self._edges.get_rect(item_id))
+        elif change == 'edge_changed':
+            self._invalidate(self._edges.get_rect(item_id))
+        elif change == 'edge_removed':
+            self._invalidate(self._edges.get_rect(item_id))
+            self._edges.remove(item_id)
+        else:
+            self._rebuild()
+
+    def _invalidate(self, rect: pygame.Rect) -> None:
+        """世界坐标中的区域已修改：使相关瓦片失效并重绘"""
+        if self.tiles is not None:
+            self.tiles.invalidate(rect)
+        if self.lod() == LOD_DENSITY:
+            # 密度块比节点大，直接重绘整个画布
+            self.mark_dirty()
+        else:
+            self.mark_world_dirty(rect)
+
+    # 细节层次
+    def lod(self, zoom: Optional[float] = None) -> str:
+        """该缩放（默认为当前缩放）下的细节层次"""
+        zoom = self.zoom if zoom is None else zoom
+        if zoom >= self.text_zoom:
+            return LOD_FULL
+        if zoom >= self.box_zoom:
+            return LOD_BOX
+        return LOD_DENSITY
+
+    def set_lod(self, text_zoom: float, box_zoom: float) -> None:
+        """修改细节层次的阈值"""
+        if box_zoom > text_zoom:
+            raise ValueError("box_zoom不能大于text_zoom")
+        self.text_zoom = text_zoom
+        self.box_zoom = box_zoom
+        if self.tiles is not None:
+            self.tiles.clear()
+        self.mark_dirty()
+
+    # 坐标变换
+    def world_to_screen(self, x: float, y: float) -> Tuple[int, int]:
+        """世界坐标转换为屏幕坐标"""
+        return (
+            round(self.rect.x + (x - self.view_x) * self.zoom),
+            round(self.rect.y + (y - self.view_y) * self.zoom)
+        )
+
+    def screen_to_world(self, x: float, y: float) -> Point:
+        """屏幕坐标转换为世界坐标"""
+        return (
+            self.view_x + (x - self.rect.x) / self.zoom,
+            self.view_y + (y - self.rect.y) / self.zoom
+        )
+
+    def world_rect_to_screen(self, rect: Any) -> pygame.Rect:
+        """世界坐标矩形转换为屏幕坐标矩形"""
+        rect = pygame.Rect(rect)
+        left, top = self.world_to_screen(rect.left, rect.top)
+        right, bottom = self.world_to_screen(rect.right, rect.bottom)
+        return pygame.Rect(left, top, max(1, right - left), max(1, bottom - top))
+
+    def visible_world_rect(self) -> pygame.Rect:
+        """视口对应的世界坐标矩形"""
+        return pygame.Rect(
+            int(self.view_x) - 1,
+            int(self.view_y) - 1,
+            int(self.rect.width / self.zoom) + 3,
+            int(self.rect.height / self.zoom) + 3
+        )
+
+    # 视口
+    def pan(self, dx: float, dy: float) -> None:
+        """按屏幕像素平移视口"""
+        if dx or dy:
+            self._heading = ((dx < 0) - (dx > 0), (dy < 0) - (dy > 0))
+            self.view_x -= dx / self.zoom
+            self.view_y -= dy / self.zoom
+            self._view_changed()
+
+    def zoom_at(self, factor: float, pos: Optional[Tuple[int, int]] = None) -> None:
+        """以屏幕上的pos（默认为画布中心）为中心缩放"""
+        zoom = min(self.max_zoom, max(self.min_zoom, self.zoom * factor))
+        if zoom == self.zoom:
+            return
+        if pos is None:
+            pos = self.rect.center
+        wx, wy = self.screen_to_world(*pos)
+        self.zoom = zoom
+        self.view_x = wx - (pos[0] - self.rect.x) / zoom
+        self.view_y = wy - (pos[1] - self.rect.y) / zoom
+        self._view_changed()
+
+    def center_on(self, x: float, y: float) -> None:
+        """把世界坐标(x, y)移到视口中心"""
+        self.view_x = x - self.rect.width / 2 / self.zoom
+        self.view_y = y - self.rect.height / 2 / self.zoom
+        self._view_changed()
+
+    def subscribe_view(self, listener: Callable[[], None]) -> None:
+        """订阅视口（平移、缩放）变化的通知"""
+        self._view_listeners.append(listener)
+
+    def unsubscribe_view(self, listener: Callable[[], None]) -> None:
+        """取消订阅"""
+        self._view_listeners.remove(listener)
+
+    def _view_changed(self) -> None:
+        self.mark_dirty()
+        for listener in self._view_listeners:
+            listener()
+
+    # 重绘
+    def mark_dirty(self, rect: Optional[pygame.Rect] = None) -> None:
+        """通知窗口该区域需要重绘，默认为整个画布"""
+        add_dirty = getattr(self.win, 'add_dirty', None)
+        if add_dirty is not None:
+            add_dirty(self.rect if rect is None else rect.clip(self.rect))
+
+    def mark_world_dirty(self, rect: pygame.Rect) -> None:
+        """通知窗口世界坐标中的区域需要重绘"""
+        self.mark_dirty(self.world_rect_to_screen(rect).inflate(4, 4))
+
+    def get_bounds(self) -> pygame.Rect:
+        """返回绘制区域"""
+        return self.rect
+
+    def visible_nodes(self) -> List[int]:
+        """与视口相交的节点，按ID排序"""
+        return sorted(self._nodes.query_rect(self.visible_world_rect()))
+
+    def visible_edges(self) -> List[int]:
+        """与视口相交的边"""
+        return self._edges.query_rect(self.visible_world_rect())
+
+    def draw(self) -> None:
+        """绘制视口内的边和节点"""
+        profiler = getattr(self.win, 'profiler', None)
+        if profiler is None:
+            self._draw()
+            return
+        with profiler.section('canvas'):
+            self._draw()
+
+    def _draw(self) -> None:
+        surface = self.win.get_window()
+        clip = surface.get_clip()
+        surface.set_clip(self.rect.clip(clip))
+        if self.document is None:
+            surface.fill(self.background, self.rect)
+        elif self.lod() == LOD_DENSITY:
+            self._draw_density(surface)
+        elif self.tiles is None:
+            surface.fill(self.background, self.rect)
+            scene = self._snapshot(self.visible_world_rect())
+            self._paint(
+                surface, scene, self.zoom, self.view_x, self.view_y,
+                self.rect.x, self.rect.y, self._font(self.zoom)
+            )
+        else:
+            self._draw_tiles(surface)
+        surface.set_clip(clip)
+
+    def _snapshot(self, world_rect: pygame.Rect) -> Scene:
+        """取出与世界坐标矩形相交的边和节点；索引中的矩形只会被替换，不会被原地修改"""
+        doc = self.document
+        node_rect = self._nodes.get_rect
+        endpoints = doc.edge_endpoints
+        edges = []
+        for edge_id in self._edges.query_rect(world_rect):
+            src, dst = endpoints(edge_id)
+            edges.append((node_rect(src).center, node_rect(dst).center))
+        nodes = [
+            (node_rect(node_id), int(doc.node_kind(node_id)), doc.node_text(node_id))
+            for node_id in sorted(self._nodes.query_rect(world_rect))
+        ]
+        return edges, nodes
+
+    def _font(self, zoom: float) -> Optional[pygame.font.Font]:
+        """该缩放下的字体，字号取整，缩放时只会用到有限几种字体；不画文字时为None"""
+        size = round(self.fontsize * zoom)
+        if size < 6 or self.lod(zoom) != LOD_FULL:
+            return None
+        return get_font(self.fontname, size)
+
+    def _paint(
+            self,
+            surface: pygame.Surface,
+            scene: Scene,
+            zoom: float,
+            ox: float,
+            oy: float,
+            dx: int,
+            dy: int,
+            font: Optional[pygame.font.Font]
+        ) -> None:
+        """
+        把快照画到surface上，世界坐标(x, y)画在(dx + (x - ox) * zoom, dy + (y - oy) * zoom)
+
+        只读取快照和颜色设置，可以在后台线程中调用。
+        """
+        edges, nodes = scene
+        boxes = self.lod(zoom) == LOD_BOX
+        for (x0, y0), (x1, y1) in edges:
+            pygame.draw.line(
+                surface, self.edgecolor,
+                (round(dx + (x0 - ox) * zoom), round(dy + (y0 - oy) * zoom)),
+                (round(dx + (x1 - ox) * zoom), round(dy + (y1 - oy) * zoom))
+            )
+        for world, kind, text in nodes:
+            left, top = round(dx + (world.left - ox) * zoom), round(dy + (world.top - oy) * zoom)
+            right, bottom = round(dx + (world.right - ox) * zoom), round(dy + (world.bottom - oy) * zoom)
+            rect = pygame.Rect(left, top, max(1, right - left), max(1, bottom - top))
+            if boxes:
+                surface.fill(NODE_COLORS.get(kind, NODE_COLORS[1]), rect)
+                continue
+            self._draw_shape(surface, kind, rect)
+            if font is not None and text:
+                text_surf = render_text(font, text, True, self.foreground)
+                # 文字裁剪到节点内，节点修改时只需重绘节点所在的瓦片
+                text_rect = text_surf.get_rect(center=rect.center)
+                shown = text_rect.clip(rect)
+                if shown:
+                    surface.blit(text_surf, shown, shown.move(-text_rect.x, -text_rect.y))
+
+    def _draw_density(self, surface: pygame.Surface) -> None:
+        """
+        画密度块：每个格子对应小图上的一个像素，放大后blit到屏幕上
+
+        放大后的图比视口向四周多出半个视口，只在缩放或视口移出这一范围时重建；
+        文档修改时由_patch_density()只改动相关的格子，平移时只有一次blit。
+        """
+        pyramid, zoom = self._density, self.zoom
+        level = pyramid.level_for(zoom, self.block_size)
+        span = pyramid.span(level)
+        x0, y0, x1, y1 = pyramid.cell_range(level, self.visible_world_rect())
+        key = (zoom, level, self.background, self.densitycolor)
+        built = self._density_key
+        if (built is None or built[0] != key
+                or not (built[1] <= x0 and built[2] <= y0 and x1 <= built[3] and y1 <= built[4])):
+            mx, my = (x1 - x0) // 2 + 1, (y1 - y0) // 2 + 1
+            x0, y0, x1, y1 = x0 - mx, y0 - my, x1 + mx, y1 + my
+            cols, rows = x1 - x0 + 1, y1 - y0 + 1
+            small = pygame.Surface((cols, rows), 0, surface)
+            small.fill(self.background)
+            # 覆盖率量化为16级，颜色预先算好
+            self._density_palette = palette = [self._shade(i / 15) for i in range(16)]
+            mapped = [small.map_rgb(color) for color in palette]
+            set_at = small.set_at
+            area = pygame.Rect(x0 * span, y0 * span, cols * span, rows * span)
+            for cx, cy, count, coverage in pyramid.cells(level, area):
+                set_at((cx - x0, cy - y0), mapped[round(coverage * 15)])
+            size = (max(1, round(cols * span * zoom)), max(1, round(rows * span * zoom)))
+            self._density_surface = pygame.transform.scale(small, size)
+            self._density_key = built = (key, x0, y0, x1, y1)
+        surface.fill(self.background, self.rect)
+        surface.blit(self._density_surface, self.world_to_screen(built[1] * span, built[2] * span))
+
+    def _patch_density(self, rect: Any) -> None:
+        """节点增删改后重画密度图中该节点所在的格子"""
+        built = self._density_key
+        if built is None:
+            return
+        (zoom, level, *_), x0, y0, x1, y1 = built
+        cx, cy = self._density.cell_of(level, rect)
+        if not (x0 <= cx <= x1 and y0 <= cy <= y1):
+            return
+        coverage = self._density.coverage(level, cx, cy)
+        color = self.background if coverage is None else self._density_palette[round(coverage * 15)]
+        # 与transform.scale的最近邻取样对齐
+        width, height = self._density_surface.get_size()
+        sx, sy = width / (x1 - x0 + 1), height / (y1 - y0 + 1)
+        left, top = round((cx - x0) * sx), round((cy - y0) * sy)
+        right, bottom = round((cx - x0 + 1) * sx), round((cy - y0 + 1) * sy)
+        self._density_surface.fill(color, (left, top, right - left, bottom - top))
+
+    def _shade(self, coverage: float) -> Color:
+        """按覆盖率在背景色和密度色之间插值，稀疏的格子也保持可见"""
+        t = min(1.0, 0.25 + coverage)
+        return tuple(round(b + (d - b) * t) for b, d in zip(self.background, self.densitycolor))  # type: ignore[return-value]
+
+    # 瓦片
+    def _draw_tiles(self, surface: pygame.Surface) -> None:
+        """把视口内的瓦片blit到屏幕上，缺少的瓦片立即渲染"""
+        tiles = self.tiles
+        self._collect_tiles()
+        zoom, size = self.zoom, tiles.tile_size
+        # 瓦片按整数像素对齐，相邻瓦片之间没有缝隙
+        base_x = round(self.rect.x - self.view_x * zoom)
+        base_y = round(self.rect.y - self.view_y * zoom)
+        clip = surface.get_clip()
+        x0, y0, x1, y1 = tile_range(self.visible_world_rect(), zoom, size)
+        for tx in range(x0, x1 + 1):
+            for ty in range(y0, y1 + 1):
+                dest = pygame.Rect(base_x + tx * size, base_y + ty * size, size, size)
+                if not dest.colliderect(clip):
+                    continue
+                key = (zoom, tx, ty)
+                tile = tiles.get(key)
+                if tile is None:
+                    tile = self._tile_job(key)()
+                    tiles.put(key, tile)
+                surface.blit(tile, dest)
+        if self._worker is not None:
+            self._prefetch(x0, y0, x1, y1)
+
+    def _tile_job(self, key: TileKey) -> Callable[[], pygame.Surface]:
+        """在主线程中取好瓦片所需的数据，返回渲染瓦片的函数"""
+        zoom, tx, ty = key
+        size = self.tiles.tile_size
+        pad = math.ceil(2 / zoom)
+        scene = self._snapshot(tile_world_rect(key, size).inflate(2 * pad, 2 * pad))
+        font = self._font(zoom)
+        screen = self.win.get_window()
+        def render() -> pygame.Surface:
+            tile = pygame.Surface((size, size), 0, screen)
+            tile.fill(self.background)
+            self._paint(tile, scene, zoom, 0, 0, -tx * size, -ty * size, font)
+            return tile
+        return render
+
+    def _prefetch(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        """把视口周围prefetch圈内缺少的瓦片交给后台线程，平移方向前方的优先"""
+        tiles, worker = self.tiles, self._worker
+        state = (self.zoom, x0, y0, x1, y1, tiles.epoch)
+        if state == self._prefetched:
+            return
+        self._prefetched = state
+        worker.cancel()
+        margin = self.prefetch
+        cx, cy = (x0 + x1) / 2 + self._heading[0], (y0 + y1) / 2 + self._heading[1]
+        keys = [
+            (self.zoom, tx, ty)
+            for tx in range(x0 - margin, x1 + margin + 1)
+            for ty in range(y0 - margin, y1 + margin + 1)
+        ]
+        keys.sort(key=lambda key: (key[1] - cx) ** 2 + (key[2] - cy) ** 2)
+        for key in keys:
+            if key not in tiles and not worker.is_pending(key):
+                worker.submit(key, tiles.epoch, self._tile_job(key))
+
+    def _collect_tiles(self) -> None:
+        """放入后台渲染好的瓦片，渲染期间发生过失效的丢弃"""
+        if self._worker is None:
+            return
+        for key, epoch, tile in self._worker.collect():
+            if epoch == self.tiles.epoch:
+                self.tiles.put(key, tile)
+
+    def _draw_shape(self, surface: pygame.Surface, kind: int, rect: pygame.Rect) -> None:
+        """按节点类型绘制外形：开始/结束为圆角矩形，判断为菱形，输入输出为平行四边形"""
+        fill = NODE_COLORS.get(kind, NODE_COLORS[1])
+        if kind == 2:
+            points = [rect.midtop, rect.midright, rect.midbottom, rect.midleft]
+            pygame.draw.polygon(surface, fill, points)
+            pygame.draw.polygon(surface, self.foreground, points, 1)
+        elif kind == 3:
+            skew = rect.height // 4
+            points = [
+                (rect.left + skew, rect.top), rect.topright,
+                (rect.right - skew, rect.bottom), rect.bottomleft
+            ]
+            pygame.draw.polygon(surface, fill, points)
+            pygame.draw.polygon(surface, self.foreground, points, 1)
+        else:
+            radius = rect.height // 2 if kind in (0, 4) else 0
+            pygame.draw.rect(surface, fill, rect, border_radius=radius)
+            pygame.draw.rect(surface, self.foreground, rect, 1, border_radius=radius)
+
+    # 事件
+    def get_events(self) -> Tuple[int, ...]:
+        """返回需要接收的事件类型"""
+        return (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEWHEEL)
+
+    def check(self, event: pygame.event.Event) -> None:
+        """左键拖动平移，滚轮缩放"""
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            if self.rect.collidepoint(event.pos):
+                self._drag = event.pos
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self._drag = None
+        elif event.type == pygame.MOUSEMOTION and self._drag is not None:
+            self.pan(event.pos[0] - self._drag[0], event.pos[1] - self._drag[1])
+            self._drag = event.pos
+        elif event.type == pygame.MOUSEWHEEL:
+            pos = pygame.mouse.get_pos()
+            if self.rect.collidepoint(pos):
+                self.zoom_at(1.1 ** event.y, pos)
@@ -0,0 +1,56 @@
+"""字体注册表模块"""
+import pygame
+from typing import Dict, Optional, Set, Tuple
+
+class FontRegistry:
+    """进程内共享字体，每个(名称, 字号, 粗体, 斜体)只解析一次"""
+    def __init__(self) -> None:
+        self._fonts: Dict[Tuple[str, int, bool, bool], pygame.font.Font] = {}
+        self._available: Optional[Set[str]] = None
+
+    @staticmethod
+    def _simple_name(name: str) -> str:
+        """与pygame.sysfont相同的名称简化规则"""
+        return ''.join(c.lower() for c in name if c.isalnum())
+
+    def _scan(self) -> Set[str]:
+        """扫描系统字体列表，每个进程最多一次"""
+        if self._available is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self._available = set(pygame.font.get_fonts())
+        return self._available
+
+    def _resolve(self, name: str, size: int, bold: bool, italic: bool) -> pygame.font.Font:
+        """创建字体，系统中不存在的名称直接使用默认字体"""
+        available = self._scan()
+        for part in name.split(','):
+            if self._simple_name(part) in available:
+                return pygame.font.SysFont(part, size, bold, italic)
+        font = pygame.font.Font(None, size)
+        font.set_bold(bold)
+        font.set_italic(italic)
+        return font
+
+    def get(self, name: str, size: int, bold: bool = False, italic: bool = False) -> pygame.font.Font:
+        """返回共享的字体对象"""
+        key = (name, size, bold, italic)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._resolve(name, size, bold, italic)
+            self._fonts[key] = font
+        return font
+
+    def clear(self) -> None:
+        """清空已解析的字体（pygame.font.quit后需要调用）"""
+        self._fonts.clear()
+
+    def __len__(self) -> int:
+        return len(self._fonts)
+
+# 所有组件共用的注册表
+fonts = FontRegistry()
+
+def get_font(name: str, size: int, bold: bool = False, italic: bool = False) -> pygame.font.Font:
+    """从共享注册表获取字体"""
+    return fonts.get(name, size, bold, italic)
@@ -2,6 +2,8 @@
 import pygame
 
 from .win import Windows
+from .textcache import render_text
+from .font import get_font
 
 class Label:
     """文本显示框"""
@@ -31,7 +33,7 @@ class Label:
         self.rect = pygame.Rect(x, y, width, height)
         self.border = border
         self.bordercolor = bordercolor
-        self.font = pygame.font.SysFont(fontname, fontsize)
+        self.font = get_font(fontname, fontsize)
         
         self.border_rect = pygame.Rect(x - border,  y - border, width + 2 * border, height + 2 * border)
 
@@ -46,14 +48,44 @@ class Label:
             rect=self.rect
         )
 
-        text_surf = self.font.render(self.text, True, self.foreground)
+        text_surf = render_text(self.font, self.text, True, self.foreground)
         text_rect = text_surf.get_rect(center=self.rect.center)
         self.win.get_window().blit(text_surf, text_rect)
     
+    def get_bounds(self) -> pygame.Rect:
+        """返回绘制时会覆盖的区域"""
+        return self.border_rect.union(self.rect)
+
+    def mark_dirty(self, rect: pygame.Rect|None = None) -> None:
+        """通知窗口该区域需要重绘，默认为整个组件"""
+        # 兼容直接传入Surface而不是Windows的情况
+        add_dirty = getattr(self.win, 'add_dirty', None)
+        if add_dirty is not None:
+            add_dirty(self.get_bounds() if rect is None else rect)
+
+    def set_text(self, text: str) -> None:
+        """修改文本"""
+        if text != self.text:
+            self.text = text
+            self.mark_dirty()
+
     def goto(self,position:tuple[int,int]) -> None:
         """移动文本框"""
+        if position == (self.x, self.y):
+            return
+        self.mark_dirty()
         self.x = position[0]
         self.y = position[1]
+        self.rect.topleft = position
+        self.border_rect.topleft = (self.x - self.border, self.y - self.border)
+        widget_moved = getattr(self.win, 'widget_moved', None)
+        if widget_moved is not None:
+            widget_moved(self)
+        self.mark_dirty()
+
+    def get_events(self) -> tuple[int, ...]:
+        """返回需要接收的事件类型"""
+        return ()
 
     def check(self,event: pygame.event.Event) -> None:
         """保证接口一致的空函数"""
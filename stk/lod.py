@@ -0,0 +1,103 @@
+"""细节层次模块"""
+import math
+import pygame
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 画布的细节层次
+LOD_FULL = 'full'          # 节点外形和文字
+LOD_BOX = 'box'            # 只画矩形，不画文字
+LOD_DENSITY = 'density'    # 按网格聚合的密度块
+
+class DensityPyramid:
+    """
+    多级密度网格：第k级的格子边长为cell_size * 2**k（世界坐标）
+
+    每个格子记录中心落在其中的节点数和节点面积之和，随节点增删改增量维护，
+    缩小到很小时按格子画密度块，耗时只与屏幕上的格子数有关。
+    """
+    def __init__(self, cell_size: int = 64, levels: int = 12) -> None:
+        self.cell_size = cell_size
+        self.levels = levels
+        self.version = 0
+        self._grids: List[Dict[Tuple[int, int], List[int]]] = [{} for _ in range(levels)]
+
+    def span(self, level: int) -> int:
+        """第level级格子的边长"""
+        return self.cell_size << level
+
+    def level_for(self, zoom: float, min_px: int) -> int:
+        """格子在屏幕上不小于min_px像素的最细一级"""
+        level = math.ceil(math.log2(max(min_px / (self.cell_size * zoom), 1)))
+        return min(level, self.levels - 1)
+
+    def _update(self, rect: pygame.Rect, sign: int) -> None:
+        x, y = rect.center
+        area = rect.width * rect.height
+        for level, grid in enumerate(self._grids):
+            span = self.cell_size << level
+            key = (x // span, y // span)
+            cell = grid.get(key)
+            if cell is None:
+                cell = grid[key] = [0, 0]
+            cell[0] += sign
+            cell[1] += sign * area
+            if not cell[0]:
+                del grid[key]
+        self.version += 1
+
+    def add(self, rect: pygame.Rect) -> None:
+        """加入一个节点"""
+        self._update(pygame.Rect(rect), 1)
+
+    def remove(self, rect: pygame.Rect) -> None:
+        """移除一个节点，rect须与加入时相同"""
+        self._update(pygame.Rect(rect), -1)
+
+    def clear(self) -> None:
+        """清空"""
+        for grid in self._grids:
+            grid.clear()
+        self.version += 1
+
+    def cell_of(self, level: int, rect: pygame.Rect) -> Tuple[int, int]:
+        """节点所在的格子（按中心计）"""
+        span = self.cell_size << level
+        x, y = pygame.Rect(rect).center
+        return x // span, y // span
+
+    def coverage(self, level: int, cx: int, cy: int) -> Optional[float]:
+        """格子的覆盖率，空格子为None"""
+        cell = self._grids[level].get((cx, cy))
+        if cell is None:
+            return None
+        span = self.cell_size << level
+        return min(1.0, cell[1] / (span * span))
+
+    def cell_range(self, level: int, rect: pygame.Rect) -> Tuple[int, int, int, int]:
+        """世界坐标矩形覆盖的格子范围（含两端）"""
+        span = self.cell_size << level
+        return (
+            rect.left // span,
+            rect.top // span,
+            (rect.right - 1) // span,
+            (rect.bottom - 1) // span
+        )
+
+    def cells(self, level: int, rect: pygame.Rect) -> Iterator[Tuple[int, int, int, float]]:
+        """与矩形相交的非空格子：(列, 行, 节点数, 覆盖率)"""
+        grid = self._grids[level]
+        span = self.cell_size << level
+        x0, y0, x1, y1 = self.cell_range(level, rect)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) < len(grid):
+            keys: Iterator[Tuple[int, int]] = (
+                (cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)
+                if (cx, cy) in grid
+            )
+        else:
+            keys = (key for key in grid if x0 <= key[0] <= x1 and y0 <= key[1] <= y1)
+        for key in keys:
+            count, area = grid[key]
+            yield key[0], key[1], count, min(1.0, area / (span * span))
+
+    def __len__(self) -> int:
+        return sum(cell[0] for cell in self._grids[0].values())
@@ -2,6 +2,7 @@ import pygame
 from typing import Any,Callable
 from .button import Button,kong
 from .win import Windows
+from .font import get_font
 
 class Manu:
     def __init__(self,
@@ -43,7 +44,7 @@ class Manu:
         self.fontsize = fontsize
         self.annotations = annotations
 
-        self.font = pygame.font.SysFont(fontname, fontsize)
+        self.font = get_font(fontname, fontsize)
         self.buttons = []
         self.buttons:list[Button]
         for i in range(self.button_num):
@@ -84,7 +85,30 @@ class Manu:
         for b in self.buttons:
             b.label_draw()
 
+    def get_children(self) -> list[Button]:
+        """返回子组件，供窗口直接分发事件"""
+        return self.buttons
+
+    def get_events(self) -> tuple[int, ...]:
+        """事件由子组件直接接收"""
+        return ()
+
+    def get_bounds(self) -> pygame.Rect:
+        """返回绘制区域（菜单栏及按钮）"""
+        bounds = pygame.Rect(
+            0,
+            0,
+            self.win.get_window().get_size()[0]+self.border,
+            self.height+self.border+2
+            )
+        for b in self.buttons:
+            bounds.union_ip(b.get_bounds())
+        return bounds
+
     def check(self,event:pygame.event.Event):
-        """检测按钮是否被按下"""
+        """
+        检测按钮是否被按下
+        窗口通过get_children()直接把事件分发给按钮，此方法只供不经过窗口分发时使用
+        """
         for b in self.buttons:
             b.check(event=event)
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""缩略图模块"""
+import pygame
+from typing import Any, Optional, Tuple
+
+from .win import Windows
+from .spatial import GridIndex
+from .canvas import Canvas
+
+Color = Tuple[int, int, int]
+
+class Minimap:
+    """
+    文档缩略图
+
+    整个文档按比例缩小画在一张缓存的Surface上，文档修改时只重画受影响的区域，
+    节点超出当前范围时才整体重画；每帧只需一次blit和视口框。
+    点击或拖动缩略图把画布的视口移到对应位置。
+    """
+    def __init__(self,
+                 win: Windows,
+                 canvas: Canvas,
+                 x: int,
+                 y: int,
+                 width: int,
+                 height: int,
+                 background: Color = (245, 245, 245),
+                 nodecolor: Color = (120, 140, 180),
+                 viewcolor: Color = (220, 60, 60),
+                 bordercolor: Color = (160, 160, 160),
+                 cell_size: int = 1024
+                 ) -> None:
+        """初始化缩略图，显示画布当前的文档"""
+        self.win = win
+        self.canvas = canvas
+        self.rect = pygame.Rect(x, y, width, height)
+        self.background = background
+        self.nodecolor = nodecolor
+        self.viewcolor = viewcolor
+        self.bordercolor = bordercolor
+        self._nodes = GridIndex(cell_size)
+        # 缩略图对应的世界坐标范围及缩放比例
+        self._world = pygame.Rect(0, 0, width, height)
+        self._scale = 1.0
+        self._overview = pygame.Surface(self.rect.size, 0, win.get_window())
+        self._view: Optional[pygame.Rect] = None
+        self._drag = False
+        self.document: Any = None
+        canvas.subscribe_view(self._on_view)
+        if canvas.document is not None:
+            self.bind(canvas.document)
+        else:
+            self._rebuild()
+
+    # 文档
+    def bind(self, document: Any) -> None:
+        """显示另一个文档"""
+        if self.document is not None:
+            self.document.unsubscribe(self._on_change)
+        self.document = document
+        self._rebuild()
+        document.subscribe(self._on_change)
+
+    def unbind(self) -> None:
+        """停止显示文档"""
+        if self.document is not None:
+            self.document.unsubscribe(self._on_change)
+            self.document = None
+        self._rebuild()
+
+    def close(self) -> None:
+        """停止跟随文档和画布"""
+        self.unbind()
+        self.canvas.unsubscribe_view(self._on_view)
+
+    def _rebuild(self) -> None:
+        """重建索引，按文档范围重新确定比例并整体重画"""
+        self._nodes.clear()
+        doc = self.document
+        if doc is not None:
+            for node_id in doc.node_ids():
+                self._nodes.insert(node_id, doc.node_rect(node_id))
+        rects = [rect for _, rect in self._nodes.items()]
+        self._fit(rects[0].unionall(rects) if rects else pygame.Rect(0, 0, *self.rect.size))
+
+    def _fit(self, bounds: pygame.Rect) -> None:
+        """让世界坐标范围包含bounds并留出余量，减少之后整体重画的次数"""
+        bounds = bounds.inflate(bounds.width // 4 + 2, bounds.height // 4 + 2)
+        self._scale = min(self.rect.width / bounds.width, self.rect.height / bounds.height)
+        width, height = round(self.rect.width / self._scale), round(self.rect.height / self._scale)
+        self._world = pygame.Rect(0, 0, width, height)
+        self._world.center = bounds.center
+        self._render()
+
+    def _on_change(self, change: str, item_id: int, old: Any) -> None:
+        """根据文档修改只重画受影响的区域"""
+        doc = self.document
+        if change == 'node_added':
+            self._nodes.insert(item_id, doc.node_rect(item_id))
+            self._update(None, self._nodes.get_rect(item_id))
+        elif change == 'node_changed':
+            self._nodes.move(item_id, doc.node_rect(item_id))
+            self._update(pygame.Rect(old), self._nodes.get_rect(item_id))
+        elif change == 'node_removed':
+            self._nodes.remove(item_id)
+            self._update(pygame.Rect(old), None)
+        elif change not in ('edge_added', 'edge_changed', 'edge_removed'):
+            self._rebuild()
+            self.mark_dirty()
+
+    def _update(self, old: Optional[pygame.Rect], new: Optional[pygame.Rect]) -> None:
+        if new is not None and not self._world.contains(new):
+            self._fit(self._world.union(new))
+        else:
+            for rect in (old, new):
+                if rect is not None:
+                    self._repaint(rect)
+        self.mark_dirty()
+
+    # 坐标变换
+    def world_to_local(self, rect: Any) -> pygame.Rect:
+        """世界坐标矩形转换为缩略图内的坐标，至少1像素"""
+        rect = pygame.Rect(rect)
+        left = int((rect.left - self._world.x) * self._scale)
+        top = int((rect.top - self._world.y) * self._scale)
+        right = int((rect.right - self._world.x) * self._scale)
+        bottom = int((rect.bottom - self._world.y) * self._scale)
+        return pygame.Rect(left, top, max(1, right - left), max(1, bottom - top))
+
+    def local_to_world(self, x: float, y: float) -> Tuple[float, float]:
+        """缩略图内的坐标转换为世界坐标"""
+        return self._world.x + x / self._scale, self._world.y + y / self._scale
+
+    # 缓存的缩略图
+    def _render(self) -> None:
+        """整体重画"""
+        self._overview.fill(self.background)
+        # 与world_to_local()相同的变换，展开以减少大文档的整体重画耗时
+        fill, color = self._overview.fill, self.nodecolor
+        ox, oy, scale = self._world.x, self._world.y, self._scale
+        for _, rect in self._nodes.items():
+            left, top = int((rect.left - ox) * scale), int((rect.top - oy) * scale)
+            right, bottom = int((rect.right - ox) * scale), int((rect.bottom - oy) * scale)
+            fill(color, (left, top, max(1, right - left), max(1, bottom - top)))
+
+    def _repaint(self, world: pygame.Rect) -> None:
+        """重画世界坐标矩形覆盖的像素"""
+        area = self.world_to_local(world).inflate(2, 2).clip(self._overview.get_rect())
+        if not area:
+            return
+        self._overview.fill(self.background, area)
+        left, top = self.local_to_world(area.x, area.y)
+        right, bottom = self.local_to_world(area.right, area.bottom)
+        query = pygame.Rect(int(left) - 1, int(top) - 1, int(right - left) + 3, int(bottom - top) + 3)
+        self._overview.set_clip(area)
+        for node_id in self._nodes.query_rect(query):
+            self._overview.fill(self.nodecolor, self.world_to_local(self._nodes.get_rect(node_id)))
+        self._overview.set_clip(None)
+
+    # 视口
+    def _view_rect(self) -> pygame.Rect:
+        """画布视口在缩略图中的位置（屏幕坐标）"""
+        return self.world_to_local(self.canvas.visible_world_rect()).move(self.rect.topleft)
+
+    def _on_view(self) -> None:
+        """画布视口变化时，只有视口框移动了才重绘"""
+        if self._view_rect() != self._view:
+            self.mark_dirty()
+
+    def _jump(self, pos: Tuple[int, int]) -> None:
+        """把画布视口的中心移到缩略图上的pos"""
+        self.canvas.center_on(*self.local_to_world(pos[0] - self.rect.x, pos[1] - self.rect.y))
+
+    # 重绘
+    def mark_dirty(self) -> None:
+        """通知窗口需要重绘"""
+        add_dirty = getattr(self.win, 'add_dirty', None)
+        if add_dirty is not None:
+            add_dirty(self.rect)
+
+    def get_bounds(self) -> pygame.Rect:
+        """返回绘制区域"""
+        return self.rect
+
+    def draw(self) -> None:
+        """绘制缩略图和视口框"""
+        surface = self.win.get_window()
+        surface.blit(self._overview, self.rect)
+        self._view = self._view_rect()
+        clip = surface.get_clip()
+        surface.set_clip(self.rect.clip(clip))
+        pygame.draw.rect(surface, self.viewcolor, self._view, 1)
+        surface.set_clip(clip)
+        pygame.draw.rect(surface, self.bordercolor, self.rect, 1)
+
+    # 事件
+    def get_events(self) -> Tuple[int, ...]:
+        """返回需要接收的事件类型"""
+        return (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+
+    def check(self, event: pygame.event.Event) -> None:
+        """点击或拖动时移动画布视口"""
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            if self.rect.collidepoint(event.pos):
+                self._drag = True
+                self._jump(event.pos)
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self._drag = False
+        elif event.type == pygame.MOUSEMOTION and self._drag:
+            self._jump(event.pos)
@@ -0,0 +1,155 @@
+"""帧耗时分析模块"""
+import time
+import pygame
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from .font import get_font
+
+_LINE_HEIGHT = 16
+
+class _Section:
+    """计时区段，同名区段复用同一个对象，可以嵌套其他区段但不能嵌套自身"""
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler: 'FrameProfiler', name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> '_Section':
+        self.profiler._depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        seconds = time.perf_counter() - self.start
+        self.profiler._depth -= 1
+        self.profiler.add(self.name, seconds)
+
+class _NullSection:
+    """关闭分析时使用的空区段"""
+    def __enter__(self) -> '_NullSection':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+_NULL_SECTION = _NullSection()
+
+class FrameProfiler:
+    """
+    按帧统计各区段耗时，保留最近window帧并计算分位数
+
+    组件可以用 `with profiler.section('名称'):` 登记自己的区段；
+    同一帧内同名区段的耗时累加，end_frame()时记为一个样本。
+    区段可以嵌套（如'check'内每个组件的'check:类名'），
+    'frame' 为每帧最外层区段之和（不含空闲等待和帧率限制的休眠）。
+    """
+    def __init__(self, window: int = 300, enabled: bool = True) -> None:
+        self.window = window
+        self.enabled = enabled
+        self.frames = 0
+        self._sections: Dict[str, _Section] = {}
+        self._current: Dict[str, float] = {}
+        self._total = 0.0
+        self._depth = 0
+        self._samples: Dict[str, 'deque[float]'] = {}
+
+    def section(self, name: str) -> Any:
+        """计时区段的上下文管理器"""
+        if not self.enabled:
+            return _NULL_SECTION
+        section = self._sections.get(name)
+        if section is None:
+            section = self._sections[name] = _Section(self, name)
+        return section
+
+    def add(self, name: str, seconds: float) -> None:
+        """把耗时计入本帧的区段"""
+        self._current[name] = self._current.get(name, 0.0) + seconds
+        if not self._depth:
+            self._total += seconds
+
+    def end_frame(self) -> None:
+        """结束一帧，把本帧各区段的耗时记为样本"""
+        if not self._current:
+            return
+        for name, seconds in self._current.items():
+            self._series(name).append(seconds)
+        self._series('frame').append(self._total)
+        self._current = {}
+        self._total = 0.0
+        self.frames += 1
+
+    def _series(self, name: str) -> 'deque[float]':
+        series = self._samples.get(name)
+        if series is None:
+            series = self._samples[name] = deque(maxlen=self.window)
+        return series
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """各区段最近window帧的统计（毫秒）：p50、p95、p99、平均值、最大值"""
+        stats: Dict[str, Dict[str, float]] = {}
+        for name, series in self._samples.items():
+            if not series:
+                continue
+            ordered = sorted(series)
+            last = len(ordered) - 1
+            stats[name] = {
+                'p50': ordered[int(last * 0.50)] * 1000,
+                'p95': ordered[int(last * 0.95)] * 1000,
+                'p99': ordered[int(last * 0.99)] * 1000,
+                'mean': sum(ordered) / len(ordered) * 1000,
+                'max': ordered[-1] * 1000
+            }
+        return stats
+
+    def reset(self) -> None:
+        """清空样本"""
+        self._current = {}
+        self._total = 0.0
+        self._samples = {}
+        self.frames = 0
+
+    def report(self) -> List[str]:
+        """每个区段一行的文字报告，'frame'在最前"""
+        stats = self.get_stats()
+        names = sorted(stats, key=lambda name: (name != 'frame', name))
+        width = max([10] + [len(name) for name in names])
+        return [
+            f"{name:<{width}} p50 {s['p50']:6.2f}  p95 {s['p95']:6.2f}  p99 {s['p99']:6.2f} ms"
+            for name, s in ((name, stats[name]) for name in names)
+        ]
+
+    def dump(self, log: Any) -> None:
+        """把报告写入日志"""
+        lines = self.report()
+        if not lines:
+            return
+        log.log_info(f"帧耗时统计（最近{min(self.frames, self.window)}帧）")
+        for line in lines:
+            log.log_info(line)
+
+    def overlay_rect(self, pos: Tuple[int, int] = (0, 0)) -> pygame.Rect:
+        """叠加层占用的区域"""
+        return pygame.Rect(pos, (300, (len(self._samples) or 1) * _LINE_HEIGHT + 8))
+
+    def draw(
+            self,
+            surface: pygame.Surface,
+            pos: Tuple[int, int] = (0, 0),
+            font: Optional[pygame.font.Font] = None
+        ) -> pygame.Rect:
+        """在surface上绘制半透明的统计叠加层，返回绘制区域"""
+        font = font or get_font("Consolas,Courier New,monospace", 14)
+        rect = self.overlay_rect(pos)
+        background = pygame.Surface(rect.size, pygame.SRCALPHA)
+        background.fill((0, 0, 0, 160))
+        surface.blit(background, rect)
+        y = rect.y + 4
+        for line in self.report():
+            # 数值每帧变化，不放入文字缓存
+            surface.blit(font.render(line, True, (255, 255, 255)), (rect.x + 4, y))
+            y += _LINE_HEIGHT
+        return rect
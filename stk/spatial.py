@@ -0,0 +1,117 @@
+"""空间索引模块"""
+import pygame
+from typing import Any, Dict, Hashable, Iterator, List, Set, Tuple, Union
+
+Cell = Tuple[int, int]
+RectLike = Union[pygame.Rect, Tuple[int, int, int, int]]
+
+class GridIndex:
+    """均匀网格空间索引，用于按坐标快速查找矩形"""
+    def __init__(self, cell_size: int = 64) -> None:
+        if cell_size <= 0:
+            raise ValueError("网格尺寸必须大于0")
+        self.cell_size = cell_size
+        self._rects: Dict[Hashable, pygame.Rect] = {}
+        self._cells: Dict[Cell, List[Hashable]] = {}
+
+    def _cell_range(self, rect: pygame.Rect) -> Tuple[int, int, int, int]:
+        """返回矩形覆盖的网格范围（含两端）"""
+        size = self.cell_size
+        return (
+            rect.left // size,
+            rect.top // size,
+            (rect.right - 1) // size,
+            (rect.bottom - 1) // size
+        )
+
+    def insert(self, item: Hashable, rect: RectLike) -> None:
+        """插入对象，已存在时抛出KeyError"""
+        if item in self._rects:
+            raise KeyError("对象已在索引中")
+        rect = pygame.Rect(rect)
+        self._rects[item] = rect
+        x0, y0, x1, y1 = self._cell_range(rect)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                self._cells.setdefault((cx, cy), []).append(item)
+
+    def _unlink(self, item: Hashable, rect: pygame.Rect) -> None:
+        """把对象从它占据的网格中移除"""
+        x0, y0, x1, y1 = self._cell_range(rect)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = self._cells[(cx, cy)]
+                bucket.remove(item)
+                if not bucket:
+                    del self._cells[(cx, cy)]
+
+    def remove(self, item: Hashable) -> None:
+        """移除对象"""
+        self._unlink(item, self._rects.pop(item))
+
+    def move(self, item: Hashable, rect: RectLike) -> None:
+        """更新对象的矩形，网格范围不变时只替换矩形"""
+        old = self._rects[item]
+        rect = pygame.Rect(rect)
+        if self._cell_range(old) == self._cell_range(rect):
+            self._rects[item] = rect
+            return
+        self._unlink(item, old)
+        del self._rects[item]
+        self.insert(item, rect)
+
+    def get_rect(self, item: Hashable) -> pygame.Rect:
+        """返回对象当前的矩形"""
+        return self._rects[item]
+
+    def query_point(self, pos: Tuple[int, int]) -> List[Any]:
+        """返回矩形包含该点的所有对象"""
+        size = self.cell_size
+        bucket = self._cells.get((pos[0] // size, pos[1] // size))
+        if not bucket:
+            return []
+        return [item for item in bucket if self._rects[item].collidepoint(pos)]
+
+    def query_rect(self, rect: RectLike) -> List[Any]:
+        """返回与矩形相交的所有对象（不重复）"""
+        rect = pygame.Rect(rect)
+        if rect.width <= 0 or rect.height <= 0:
+            return []
+        x0, y0, x1, y1 = self._cell_range(rect)
+        found: Set[Hashable] = set()
+        result: List[Any] = []
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._cells):
+            # 查询范围比已占用的网格还多时，直接遍历已占用的网格
+            buckets = [
+                bucket for (cx, cy), bucket in self._cells.items()
+                if x0 <= cx <= x1 and y0 <= cy <= y1
+            ]
+        else:
+            buckets = [
+                self._cells[cell]
+                for cell in ((cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1))
+                if cell in self._cells
+            ]
+        rects = self._rects
+        for bucket in buckets:
+            for item in bucket:
+                if item not in found:
+                    found.add(item)
+                    if rects[item].colliderect(rect):
+                        result.append(item)
+        return result
+
+    def items(self) -> Iterator[Tuple[Any, pygame.Rect]]:
+        """遍历所有(对象, 矩形)"""
+        return iter(self._rects.items())
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._rects.clear()
+        self._cells.clear()
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._rects
+
+    def __len__(self) -> int:
+        return len(self._rects)
@@ -0,0 +1,86 @@
+"""文字渲染缓存模块"""
+import threading
+import pygame
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+Color = Tuple[int, int, int]
+
+class TextCache:
+    """
+    按(字体, 文本, 抗锯齿, 颜色)缓存已渲染文字的LRU缓存
+
+    画布的瓦片在后台线程中渲染，缓存和font.render都在锁内访问。
+    """
+    def __init__(self, maxsize: int = 2048) -> None:
+        if maxsize <= 0:
+            raise ValueError("缓存容量必须大于0")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._surfaces: 'OrderedDict[Hashable, pygame.Surface]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(
+            self,
+            font: pygame.font.Font,
+            text: str,
+            antialias: bool,
+            foreground: Color,
+            background: Optional[Color] = None
+        ) -> pygame.Surface:
+        """返回渲染好的文字，命中时不再调用font.render"""
+        key = (font, text, antialias, foreground, background)
+        with self._lock:
+            surf = self._surfaces.get(key)
+            if surf is not None:
+                self.hits += 1
+                self._surfaces.move_to_end(key)
+                return surf
+            self.misses += 1
+            surf = font.render(text, antialias, foreground, background)
+            self._surfaces[key] = surf
+            if len(self._surfaces) > self.maxsize:
+                self._surfaces.popitem(last=False)
+            return surf
+
+    def resize(self, maxsize: int) -> None:
+        """修改容量，多余的旧条目会被丢弃"""
+        if maxsize <= 0:
+            raise ValueError("缓存容量必须大于0")
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._surfaces) > self.maxsize:
+                self._surfaces.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存与计数"""
+        with self._lock:
+            self._surfaces.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """返回命中/未命中计数与当前条目数"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._surfaces),
+            'maxsize': self.maxsize
+        }
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+# 所有组件共用的缓存
+text_cache = TextCache()
+
+def render_text(
+        font: pygame.font.Font,
+        text: str,
+        antialias: bool,
+        foreground: Color,
+        background: Optional[Color] = None
+    ) -> pygame.Surface:
+    """通过共享缓存渲染文字"""
+    return text_cache.render(font, text, antialias, foreground, background)
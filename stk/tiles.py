@@ -0,0 +1,194 @@
+"""瓦片缓存模块"""
+import math
+import queue
+import threading
+import pygame
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+# (缩放倍数, 列, 行)
+TileKey = Tuple[float, int, int]
+
+TILE_SIZE = 256
+
+def tile_range(rect: pygame.Rect, zoom: float, tile_size: int = TILE_SIZE) -> Tuple[int, int, int, int]:
+    """世界坐标矩形在该缩放下覆盖的瓦片范围（含两端）"""
+    span = tile_size / zoom
+    return (
+        math.floor(rect.left / span),
+        math.floor(rect.top / span),
+        math.floor((rect.right - 1) / span),
+        math.floor((rect.bottom - 1) / span)
+    )
+
+def tile_world_rect(key: TileKey, tile_size: int = TILE_SIZE) -> pygame.Rect:
+    """瓦片对应的世界坐标矩形（向外取整）"""
+    zoom, tx, ty = key
+    span = tile_size / zoom
+    left, top = math.floor(tx * span), math.floor(ty * span)
+    return pygame.Rect(left, top, math.ceil((tx + 1) * span) - left, math.ceil((ty + 1) * span) - top)
+
+class TileCache:
+    """
+    按(缩放, 列, 行)缓存已渲染瓦片的LRU缓存，总大小不超过budget_mb兆字节
+
+    每次失效都会增加epoch，后台渲染的瓦片只有在渲染期间没有发生失效时才会被接受。
+    """
+    def __init__(self, budget_mb: float = 64, tile_size: int = TILE_SIZE) -> None:
+        if budget_mb <= 0:
+            raise ValueError("缓存预算必须大于0")
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.tile_size = tile_size
+        self.size = 0
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self._tiles: 'OrderedDict[TileKey, pygame.Surface]' = OrderedDict()
+        self._levels: Dict[float, int] = {}  # 每个缩放级别的瓦片数
+
+    @staticmethod
+    def _bytes(surf: pygame.Surface) -> int:
+        return surf.get_width() * surf.get_height() * surf.get_bytesize()
+
+    def get(self, key: TileKey) -> Optional[pygame.Surface]:
+        """取出瓦片，不存在时返回None"""
+        surf = self._tiles.get(key)
+        if surf is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._tiles.move_to_end(key)
+        return surf
+
+    def put(self, key: TileKey, surf: pygame.Surface) -> None:
+        """放入瓦片，超出预算时淘汰最久未使用的"""
+        self._discard(key)
+        self._tiles[key] = surf
+        self.size += self._bytes(surf)
+        self._levels[key[0]] = self._levels.get(key[0], 0) + 1
+        while self.size > self.budget and len(self._tiles) > 1:
+            self._discard(next(iter(self._tiles)))
+
+    def _discard(self, key: TileKey) -> None:
+        surf = self._tiles.pop(key, None)
+        if surf is None:
+            return
+        self.size -= self._bytes(surf)
+        count = self._levels[key[0]] - 1
+        if count:
+            self._levels[key[0]] = count
+        else:
+            del self._levels[key[0]]
+
+    def invalidate(self, rect: pygame.Rect, margin: int = 3) -> None:
+        """使所有缩放级别中与世界坐标矩形相交的瓦片失效，margin为屏幕像素的余量（线宽、取整）"""
+        self.epoch += 1
+        for zoom in list(self._levels):
+            pad = math.ceil(margin / zoom)
+            x0, y0, x1, y1 = tile_range(rect.inflate(2 * pad, 2 * pad), zoom, self.tile_size)
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > self._levels[zoom]:
+                for key in [key for key in self._tiles if key[0] == zoom
+                            and x0 <= key[1] <= x1 and y0 <= key[2] <= y1]:
+                    self._discard(key)
+            else:
+                for tx in range(x0, x1 + 1):
+                    for ty in range(y0, y1 + 1):
+                        self._discard((zoom, tx, ty))
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self.epoch += 1
+        self._tiles.clear()
+        self._levels.clear()
+        self.size = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """返回命中、未命中次数，瓦片数及占用字节数"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'tiles': len(self._tiles),
+            'bytes': self.size,
+            'budget': self.budget
+        }
+
+    def __contains__(self, key: TileKey) -> bool:
+        return key in self._tiles
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def __iter__(self) -> Iterator[TileKey]:
+        return iter(self._tiles)
+
+class TileWorker:
+    """
+    后台渲染瓦片的线程
+
+    submit()提交的render是不访问共享可变状态的函数（所需数据在主线程中取好），
+    结果由主线程调用collect()取回。新的一批预取提交前可以用cancel()丢弃尚未开始的任务。
+    """
+    def __init__(self) -> None:
+        self._jobs: 'queue.Queue[Optional[Tuple[TileKey, int, Callable[[], pygame.Surface]]]]' = queue.Queue()
+        self._results: 'queue.SimpleQueue[Tuple[TileKey, int, Optional[pygame.Surface]]]' = queue.SimpleQueue()
+        self._pending: Set[TileKey] = set()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """启动线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._work, daemon=True, name="TileWorker")
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """丢弃未开始的任务并停止线程"""
+        self.cancel()
+        if self._thread and self._thread.is_alive():
+            self._jobs.put(None)
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def is_pending(self, key: TileKey) -> bool:
+        """瓦片是否已提交且未取回"""
+        return key in self._pending
+
+    def submit(self, key: TileKey, epoch: int, render: Callable[[], pygame.Surface]) -> None:
+        """提交一个瓦片的渲染任务"""
+        self.start()
+        self._pending.add(key)
+        self._jobs.put((key, epoch, render))
+
+    def cancel(self) -> None:
+        """丢弃尚未开始的任务"""
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+            if job is not None:
+                self._pending.discard(job[0])
+
+    def collect(self) -> List[Tuple[TileKey, int, pygame.Surface]]:
+        """取回已完成的瓦片：(键, 提交时的epoch, Surface)"""
+        done = []
+        while True:
+            try:
+                key, epoch, surf = self._results.get_nowait()
+            except queue.Empty:
+                return done
+            self._pending.discard(key)
+            if surf is not None:
+                done.append((key, epoch, surf))
+
+    def _work(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            key, epoch, render = job
+            try:
+                surf: Optional[pygame.Surface] = render()
+            except Exception:
+                surf = None
+            self._results.put((key, epoch, surf))
@@ -1,27 +1,147 @@
+import os
+import time
+import queue
 import pygame
-from typing import Tuple, Dict, Any, Callable, TYPE_CHECKING
+from collections import deque
+from typing import Tuple, Dict, List, Set, Any, Callable, TYPE_CHECKING
+
+from .spatial import GridIndex
+from .profiler import FrameProfiler
 
 if TYPE_CHECKING:
     from .button import Button
     from .manu import Manu
     from .label import Label
 
+# 按指针位置分发的事件类型
+POINTER_EVENTS = (
+    pygame.MOUSEMOTION,
+    pygame.MOUSEBUTTONDOWN,
+    pygame.MOUSEBUTTONUP,
+    pygame.MOUSEWHEEL
+)
+
+# 其他线程提交回调后用于唤醒主循环的事件类型
+CALL_SOON_EVENT = pygame.event.custom_type()
+
+class PointerRouter:
+    """用空间索引为指针事件找出接收组件"""
+    def __init__(self, cell_size:int = 64) -> None:
+        self._index = GridIndex(cell_size)
+        self._order:Dict[Any,int] = {}
+        self._hovered:List[Any] = []
+        self._captured:Dict[int,List[Any]] = {}
+
+    def add(self, tk:Any) -> None:
+        """登记组件，按登记顺序分发"""
+        if tk not in self._index:
+            self._order[tk] = len(self._order)
+            self._index.insert(tk, tk.rect)
+
+    def moved(self, tk:Any) -> None:
+        """组件移动或改变尺寸后更新索引"""
+        if tk in self._index:
+            self._index.move(tk, tk.rect)
+
+    def clear(self) -> None:
+        """清空"""
+        self._index.clear()
+        self._order = {}
+        self._hovered = []
+        self._captured = {}
+
+    def __contains__(self, tk:Any) -> bool:
+        return tk in self._index
+
+    def targets(self, event:pygame.event.Event) -> List[Any]:
+        """返回指针事件的接收者：指针下的组件、上次悬停的组件及按下时捕获的组件"""
+        pos = getattr(event, 'pos', None)
+        if pos is None:
+            pos = pygame.mouse.get_pos()
+        hits = self._index.query_point(pos)
+        targets = set(hits)
+        if event.type == pygame.MOUSEMOTION:
+            targets.update(self._hovered)
+            for captured in self._captured.values():
+                targets.update(captured)
+            self._hovered = hits
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self._captured[event.button] = hits
+        elif event.type == pygame.MOUSEBUTTONUP:
+            targets.update(self._captured.pop(event.button, ()))
+        return sorted(targets, key=self._order.__getitem__)
+
 class Windows:
-    """管理pygame窗口"""
+    """
+    管理pygame窗口
+
+    headless为True时绘制到离屏Surface，不打开窗口，绘制结果可以用export()保存为图片。
+    显示模块尚未初始化时使用SDL的dummy视频驱动，不需要显示器；
+    已用其他驱动初始化时沿用该驱动（视频驱动只能在初始化之前选择）。
+    """
     def __init__(
             self,
             mode:Tuple[int,int] = (1,1),
             title:str = "stk",
-            checks:Dict[Any,Callable[[],Any]] = {}
+            checks:Dict[Any,Callable[[],Any]] = {},
+            headless:bool = False
         ) -> None:
-        pygame.init()
-        self.screen = pygame.display.set_mode(size=mode)
-        pygame.display.set_caption(title=title)
+        self.headless = headless
+        if headless:
+            self._init_headless()
+        else:
+            pygame.init()
+        self.screen = self._create_screen(mode)
+        if not headless:
+            pygame.display.set_caption(title=title)
         self.mode = mode
         self.title = title
         self.clock = pygame.time.Clock()
+        # 帧率上限，0为不限制；离屏渲染默认不限制
+        self.fps = 0 if headless else 60
+        # 主循环的迭代次数及实际显示（或离屏模式下完成绘制）的次数
+        self.frames = 0
+        self.presents = 0
+        # 帧耗时统计默认关闭，显示叠加层或需要统计时再打开
+        self.profiler = FrameProfiler(enabled=False)
+        # 组件类型对应的事件处理分析区段名，登记组件时生成
+        self._check_labels:Dict[type,str] = {}
         self.checks:Dict[Any,Callable[[],Any]] = checks
+        self.dirty_rects:List[pygame.Rect] = []
+        self.full_redraw = True
+        # 空闲模式：没有动画时阻塞等待事件，而不是固定60帧轮询
+        self.idle = False
+        self.idle_timeout = 100
+        self.animations:Set[Any] = set()
+        self.stk_check:'list[Button|Manu|Label]' = []
+        # 事件分发表
+        self._handlers:Dict[int,List[Any]] = {}
+        self._broadcast:List[Any] = []
+        self._pointer = PointerRouter()
+        # 其他线程交给主循环执行的回调
+        self.calls_per_frame = 32
+        self._calls:'queue.SimpleQueue[Tuple[Callable[[],Any],float]]' = queue.SimpleQueue()
+        self._wakeup_posted = False
+        self._call_count = 0
+        self._call_latency:'deque[float]' = deque(maxlen=256)
     
+    @staticmethod
+    def _init_headless() -> None:
+        """用dummy视频驱动初始化pygame，环境变量只在初始化期间设置"""
+        if pygame.display.get_init():
+            # 离屏模式只绘制到普通Surface，不依赖视频驱动
+            pygame.init()
+            return
+        old = os.environ.get('SDL_VIDEODRIVER')
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        try:
+            pygame.init()
+        finally:
+            if old is None:
+                del os.environ['SDL_VIDEODRIVER']
+            else:
+                os.environ['SDL_VIDEODRIVER'] = old
+
     def get_mode(self) -> Tuple[int,int]:
         """返回窗口大小"""
         return self.mode
@@ -38,13 +158,66 @@ class Windows:
         """返回窗口对象"""
         return self.screen
     
+    def _create_screen(self,mode:Tuple[int,int]) -> pygame.Surface:
+        """创建窗口，离屏模式下创建同样大小的Surface"""
+        if self.headless:
+            return pygame.Surface(mode)
+        return pygame.display.set_mode(size=mode)
+
     def update_window(self,mode:Tuple[int,int]):
         """修改尺寸"""
-        self.screen = pygame.display.set_mode(size=mode)
+        self.screen = self._create_screen(mode)
+        self.mode = mode
+        self.invalidate()
+
+    def present(self,rects:'List[pygame.Rect]|None' = None) -> None:
+        """把绘制结果显示到屏幕，rects为None时整窗更新；离屏模式下只计数"""
+        self.presents += 1
+        if self.headless:
+            return
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+    def export(self,path:str) -> None:
+        """把当前画面保存为图片，格式由扩展名决定"""
+        pygame.image.save(self.screen, path)
+
+    def add_dirty(self,rect:pygame.Rect) -> None:
+        """标记需要重绘的区域"""
+        rect = rect.clip(self.screen.get_rect())
+        if rect.width > 0 and rect.height > 0:
+            self.dirty_rects.append(rect)
+
+    def invalidate(self) -> None:
+        """下一帧重绘整个窗口"""
+        self.full_redraw = True
+
+    def take_dirty(self) -> Tuple[bool,List[pygame.Rect]]:
+        """取出并清空待重绘区域，返回(是否整窗重绘, 合并后的区域)"""
+        full, rects = self.full_redraw, self.dirty_rects
+        self.full_redraw = False
+        self.dirty_rects = []
+        if full or not rects:
+            return full, []
+        merged:List[pygame.Rect] = []
+        for rect in rects:
+            # 与已有区域重叠时合并，直到不再相交
+            i = rect.collidelist(merged)
+            while i != -1:
+                rect = rect.union(merged.pop(i))
+                i = rect.collidelist(merged)
+            merged.append(rect)
+        if len(merged) > 32:
+            merged = [merged[0].unionall(merged[1:])]
+        return False, merged
 
     def update_title(self,title:str):
         """修改标题"""
-        pygame.display.set_caption(title=title)
+        self.title = title
+        if not self.headless:
+            pygame.display.set_caption(title=title)
     
     def add_checks(self,check:Any,func:Callable[[],Any]) -> None:
         """添加事件"""
@@ -60,35 +233,230 @@ class Windows:
         """修改事件"""
         self.checks[check] = func
 
+    def set_idle(self,enabled:bool,timeout:int = 100) -> None:
+        """
+        开关空闲模式，timeout为最长阻塞时间（毫秒）
+        只有待重绘区域都已被take_dirty()取走时才会等待，组件变化需用add_dirty()或invalidate()通知
+        """
+        if timeout <= 0:
+            raise ValueError("timeout必须大于0")
+        self.idle = enabled
+        self.idle_timeout = timeout
+
+    def begin_animation(self,key:Any) -> None:
+        """登记正在进行的动画或计时器，期间按帧率运行"""
+        self.animations.add(key)
+
+    def end_animation(self,key:Any) -> None:
+        """结束动画或计时器"""
+        self.animations.discard(key)
+
+    def is_animating(self) -> bool:
+        """是否有动画或计时器正在进行"""
+        return bool(self.animations)
+
+    def call_soon(self,func:Callable[[],Any]) -> None:
+        """在主循环的下一帧执行func，可以从任意线程调用"""
+        self._calls.put((func, time.perf_counter()))
+        if not self._wakeup_posted:
+            self._wakeup_posted = True
+            try:
+                pygame.event.post(pygame.event.Event(CALL_SOON_EVENT))
+            except pygame.error:
+                # 窗口已关闭，回调留在队列中
+                pass
+
+    def run_calls(self) -> int:
+        """在主线程执行排队的回调，每帧最多calls_per_frame个，返回执行的个数"""
+        # 先清除标记再取队列，之后提交的回调会重新唤醒主循环
+        self._wakeup_posted = False
+        count = 0
+        while count < self.calls_per_frame:
+            try:
+                func, queued = self._calls.get_nowait()
+            except queue.Empty:
+                break
+            self._call_latency.append(time.perf_counter() - queued)
+            count += 1
+            func()
+        self._call_count += count
+        return count
+
+    def get_call_stats(self) -> Dict[str,float]:
+        """回调统计：执行总数、待执行数及最近回调从提交到执行的延迟（毫秒）"""
+        latency = self._call_latency
+        return {
+            'calls': self._call_count,
+            'pending': self._calls.qsize(),
+            'last_ms': latency[-1] * 1000 if latency else 0.0,
+            'mean_ms': sum(latency) / len(latency) * 1000 if latency else 0.0,
+            'max_ms': max(latency) * 1000 if latency else 0.0
+        }
+
+    def _should_wait(self) -> bool:
+        """空闲且没有待绘制内容时才阻塞"""
+        return (self.idle
+                and self._calls.empty()
+                and not self.animations
+                and not self.dirty_rects
+                and not self.full_redraw)
+
+    def _get_events(self) -> List[pygame.event.Event]:
+        """取出本帧的事件，空闲时最多阻塞idle_timeout毫秒"""
+        if not self._should_wait():
+            with self.profiler.section('events'):
+                return pygame.event.get()
+        # 超时用于让其他线程修改的状态（如退出标志）得到检查，等待的时间不计入统计
+        event = pygame.event.wait(self.idle_timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+        with self.profiler.section('events'):
+            return [event] + pygame.event.get()
+
     def stk_event(self, func:'list[Button|Manu|Label]'):
         """绑定组件们的检测"""
         self.stk_check = func
-    
-    def running(self) -> bool:
-        """保持运行并检测"""
-        for event in pygame.event.get():
-            if event.type in list(self.checks.keys()):
-                self.checks[event.type]
-            if event.type == pygame.QUIT:
-                return False
-            for tk in self.stk_check:
+        self._handlers = {}
+        self._broadcast = []
+        self._pointer.clear()
+        for tk in func:
+            self._subscribe(tk)
+
+    def _subscribe(self, tk:Any) -> None:
+        """按组件声明的事件类型登记，容器组件登记其子组件"""
+        get_children = getattr(tk, 'get_children', None)
+        if get_children is not None:
+            for child in get_children():
+                self._subscribe(child)
+        cls = type(tk)
+        if cls not in self._check_labels:
+            self._check_labels[cls] = f"check:{cls.__name__}"
+        get_events = getattr(tk, 'get_events', None)
+        if get_events is None:
+            # 未声明事件类型的组件接收所有事件
+            self._broadcast.append(tk)
+            return
+        events = get_events()
+        if not events:
+            return
+        for event_type in events:
+            if event_type in POINTER_EVENTS:
+                self._pointer.add(tk)
+            else:
+                self._handlers.setdefault(event_type, []).append(tk)
+
+    def widget_moved(self, tk:Any) -> None:
+        """组件移动或改变尺寸后更新索引"""
+        self._pointer.moved(tk)
+
+    def dispatch(self, event:pygame.event.Event) -> None:
+        """把事件分发给关心它的组件，开启帧耗时统计时每个组件的处理计入'check:类名'区段"""
+        profiling = self.profiler.enabled
+        section, labels = self.profiler.section, self._check_labels
+        for tk in self._broadcast:
+            if profiling:
+                with section(labels[type(tk)]):
+                    tk.check(event)
+            else:
+                tk.check(event)
+        if event.type in POINTER_EVENTS:
+            targets = self._pointer.targets(event)
+        else:
+            targets = self._handlers.get(event.type, ())
+        for tk in targets:
+            if profiling:
+                with section(labels[type(tk)]):
+                    tk.check(event)
+            else:
                 tk.check(event)
-        self.clock.tick(60)
+
+    def running(self) -> bool:
+        """保持运行并检测，每次调用为主循环的一帧"""
+        self.frames += 1
+        events = self._get_events()
+        with self.profiler.section('check'):
+            for event in events:
+                func = self.checks.get(event.type)
+                if func is not None:
+                    func()
+                if event.type == pygame.QUIT:
+                    return False
+                if event.type != CALL_SOON_EVENT:
+                    self.dispatch(event)
+        with self.profiler.section('calls'):
+            self.run_calls()
+        self.clock.tick(self.fps)
         return True
 
 class Game:
     """pygame游戏基类"""
-    def __init__(self) -> None:
-        self.window = Windows()
+    def __init__(self, headless:bool = False) -> None:
+        self.window = Windows(headless=headless)
         self.running = True
         self.color = (200,200,200)
         self.stks:'list[Button|Manu|Label]' = []
+        # 脏矩形模式：只重绘组件报告过变化的区域
+        self.dirty_rendering = False
+        self.profiler = self.window.profiler
+        self.show_profiler = False
+
+    def toggle_profiler(self) -> None:
+        """开关帧耗时叠加层，只在显示期间统计并按帧率持续刷新"""
+        self.show_profiler = not self.show_profiler
+        self.profiler.enabled = self.show_profiler
+        if self.show_profiler:
+            self.window.begin_animation(self.profiler)
+        else:
+            self.window.end_animation(self.profiler)
+            self.window.invalidate()
+
+    def _profiler_pos(self) -> Tuple[int,int]:
+        """叠加层位于窗口左下角"""
+        height = self.profiler.overlay_rect().height
+        return (10, self.window.get_window().get_height() - height - 10)
+
+    def _draw_overlay(self) -> None:
+        if self.show_profiler:
+            self.profiler.draw(self.window.get_window(), self._profiler_pos())
     
     def _draw(self) -> None:
-        self.window.get_window().fill((200,200,200))
-        for i in self.stks:
-            i.draw()
-        pygame.display.flip()
+        if self.show_profiler and self.dirty_rendering:
+            self.window.add_dirty(self.profiler.overlay_rect(self._profiler_pos()))
+        if not self.dirty_rendering:
+            # 每帧整窗重绘，待重绘区域随之清空，空闲模式才能进入等待
+            self.window.take_dirty()
+            self._draw_all()
+            return
+        full, rects = self.window.take_dirty()
+        if full:
+            self._draw_all()
+        elif rects:
+            self._draw_rects(rects)
+
+    def _draw_all(self) -> None:
+        """重绘整个窗口"""
+        with self.profiler.section('draw'):
+            self.window.get_window().fill(self.color)
+            for i in self.stks:
+                i.draw()
+            self._draw_overlay()
+        with self.profiler.section('present'):
+            self.window.present()
+
+    def _draw_rects(self, rects:List[pygame.Rect]) -> None:
+        """只重绘指定区域"""
+        screen = self.window.get_window()
+        with self.profiler.section('draw'):
+            for rect in rects:
+                screen.set_clip(rect)
+                screen.fill(self.color, rect)
+                for i in self.stks:
+                    if i.get_bounds().colliderect(rect):
+                        i.draw()
+            screen.set_clip(None)
+            self._draw_overlay()
+        with self.profiler.section('present'):
+            self.window.present(rects)
         
     def _exit(self) -> None:
         """退出程序"""
@@ -100,7 +468,11 @@ class Game:
         else:
             self._exit()
 
-    def run(self) -> None:
-        while self.running:
+    def run(self, frames:'int|None' = None) -> None:
+        """运行主循环，frames不为None时最多运行frames帧后返回"""
+        frame = 0
+        while self.running and (frames is None or frame < frames):
             self._draw()
             self._check()
+            self.profiler.end_frame()
+            frame += 1
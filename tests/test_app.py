@@ -0,0 +1,42 @@
+import io
+import os
+import time
+
+import pygame
+
+from config import settings
+from core import Document, NodeKind
+from core.app import App
+from core.storage import IncrementalSaver, open_document
+from utils import LogSystem
+
+def test_headless_run() -> None:
+    app = App(LogSystem(io.StringIO()), headless=True)
+    assert not app.window.idle
+    start = time.perf_counter()
+    app.run(frames=20)
+    assert time.perf_counter() - start < 1.0
+    assert app.window.frames == 20 and not app.running
+
+def test_quit_exits_once() -> None:
+    app = App(LogSystem(io.StringIO()), headless=True)
+    stops: list[str] = []
+    app.keyer.stop = lambda: stops.append('keyer')  # type: ignore[method-assign]
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+    app.run(frames=5)
+    assert stops == ['keyer'] and app.window.frames == 1
+
+def test_startup_document(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    # 默认文件不存在时新建文档，第一次保存前不会自动保存到默认文件
+    app = App(LogSystem(io.StringIO()), headless=True)
+    assert app.saver.path is None and not os.path.exists(settings.DEFAULT_FILE)
+    app._exit()
+    # 默认文件存在时打开它，而不是用空文档覆盖
+    document = Document()
+    document.add_node(NodeKind.START, 0, 0, text='start')
+    IncrementalSaver(document, settings.DEFAULT_FILE).save()
+    app = App(LogSystem(io.StringIO()), headless=True)
+    assert app.saver.path == settings.DEFAULT_FILE and app.document.node_count() == 1
+    app.run(frames=2)
+    assert open_document(settings.DEFAULT_FILE)[0].node_count() == 1
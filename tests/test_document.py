@@ -0,0 +1,116 @@
+import struct
+
+import pytest
+
+from core import Document, NodeKind
+from core.storage import EDGE, NODE, FlowFileError, IncrementalSaver, open_document
+from core.autosave import SaveWorker
+
+@pytest.fixture
+def doc() -> Document:
+    d = Document()
+    d.add_node(NodeKind.START, 0, 0, text='start')
+    d.add_node(NodeKind.PROCESS, 0, 100, text='i += 1')
+    d.add_node(NodeKind.END, 0, 200, text='end')
+    d.add_edge(0, 1)
+    d.add_edge(1, 2)
+    return d
+
+def test_Document_lookup(doc:Document) -> None:
+    assert doc.node_count() == 3
+    assert doc.node_kind(1) == NodeKind.PROCESS
+    assert doc.node_text(1) == 'i += 1'
+    assert doc.edge_between(0, 1) == 0
+    assert doc.edge_between(1, 0) is None
+    assert doc.successors(1) == [2]
+    assert doc.predecessors(1) == [0]
+    with pytest.raises(ValueError):
+        doc.add_edge(0, 1)
+
+def test_Document_remove(doc:Document) -> None:
+    changes = []
+    doc.subscribe(lambda change, item_id, old: changes.append((change, item_id)))
+    doc.remove_node(1)
+    assert sorted(changes[:2]) == [('edge_removed', 0), ('edge_removed', 1)]
+    assert changes[2] == ('node_removed', 1)
+    assert doc.edge_count() == 0
+    assert list(doc.node_ids()) == [0, 2]
+    assert doc.add_node(NodeKind.IO, 0, 0) == 1
+    with pytest.raises(KeyError):
+        doc.node_rect(5)
+
+def test_Document_set_node_rect(doc:Document) -> None:
+    changes = []
+    doc.subscribe(lambda change, item_id, old: changes.append((change, item_id, old)))
+    doc.set_node_rect(1, (10, 110, 130, 70))
+    assert changes == [('node_changed', 1, (0, 100, 120, 60))]
+    # 非法的值不会让节点只改了一半
+    with pytest.raises(TypeError):
+        doc.set_node_rect(1, (20, 120, 140.5, 80))
+    with pytest.raises(OverflowError):
+        doc.set_node_rect(1, (20, 120, 140, 1 << 40))
+    assert doc.node_rect(1) == (10, 110, 130, 70)
+    assert len(changes) == 1
+    # 检查失败时不会占用ID
+    with pytest.raises(TypeError):
+        doc.add_node(NodeKind.IO, 0, 0, width=1.5)
+    with pytest.raises(ValueError):
+        doc.add_node(9, 0, 0)
+    assert doc.add_node(NodeKind.IO, 0, 0) == 3
+    with pytest.raises(KeyError):
+        doc.move_node(7, 0, 0)
+    doc.remove_node(3)
+    with pytest.raises(KeyError):
+        doc.move_node(3, 0, 0)
+
+def _dump(doc:Document) -> tuple[list, list]:
+    return [doc.get_node(i) for i in doc.node_ids()], [doc.get_edge(i) for i in doc.edge_ids()]
+
+def test_IncrementalSaver(doc:Document, tmp_path) -> None:
+    path = str(tmp_path / 'test.fsht')
+    saver = IncrementalSaver(doc, path)
+    assert saver.save() == 5
+    doc.remove_node(2)
+    doc.add_edge(doc.add_node(NodeKind.END, 0, 300, text='done'), 0)
+    doc.set_node_text(0, 'begin')
+    assert saver.save() == 3
+    loaded, loaded_saver = open_document(path)
+    assert _dump(loaded) == _dump(doc)
+    assert not loaded_saver.is_modified()
+
+@pytest.mark.parametrize('kind, payload', [
+    (NODE, b'\x01\x00'),                                      # 长度不足
+    (EDGE, struct.pack('<III', 0, 0, 7)),                      # 终点不存在
+    (NODE, struct.pack('<Ibiiii', 5, 0, 0, 0, 1, 1) + b'\xff') # 文字无法解码
+])
+def test_open_corrupt(doc:Document, tmp_path, kind:int, payload:bytes) -> None:
+    path = str(tmp_path / 'test.fsht')
+    IncrementalSaver(doc, path).save()
+    with open(path, 'ab') as file:
+        file.write(struct.pack('<BI', kind, len(payload)) + payload)
+    with pytest.raises(FlowFileError):
+        open_document(path)
+
+class _Log:
+    def __init__(self) -> None:
+        self.infos: list[str] = []
+        self.errors: list[str] = []
+
+    def log_info(self, info:str) -> None:
+        self.infos.append(info)
+
+    def log_error(self, error:str) -> None:
+        self.errors.append(error)
+
+def test_SaveWorker(doc:Document, tmp_path) -> None:
+    path = str(tmp_path / 'test.fsht')
+    log = _Log()
+    worker = SaveWorker(IncrementalSaver(doc, path), log, delay=60)
+    worker.start()
+    for i in range(10):
+        doc.move_node(1, i, i)
+    worker.update()
+    assert worker.is_busy()
+    worker.stop()
+    assert len(log.infos) == 1 and not log.errors
+    assert _dump(open_document(path)[0]) == _dump(doc)
@@ -0,0 +1,85 @@
+import functools
+from types import SimpleNamespace
+
+from utils import EventSystem, KeyboardHelper, on_button, on_combo
+
+class _Log:
+    def __init__(self) -> None:
+        self.infos: list[str] = []
+
+    def log_info(self, info:str) -> None:
+        self.infos.append(info)
+
+class _App:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    @on_button('test_ok', "按下{target}")
+    @on_combo('ctrl', 'e', log_message="按下Ctrl+E键")
+    def ok(self) -> None:
+        self.calls.append('ok')
+
+def test_bind_all() -> None:
+    app = _App()
+    log = _Log()
+    keyer = KeyboardHelper()
+    button = SimpleNamespace(executed=None)
+    EventSystem.bind_all(app, None, keyer, buttons={'test_ok': button})
+    assert isinstance(button.executed, functools.partial)
+    button.executed()
+    assert app.calls == ['ok']
+    EventSystem.bind_all(app, log, keyer, buttons={'test_ok': button})
+    button.executed()
+    keyer._on_press(SimpleNamespace(name='ctrl'))  # type: ignore
+    keyer._on_press(SimpleNamespace(name='e'))  # type: ignore
+    assert app.calls == ['ok', 'ok', 'ok']
+    assert log.infos == ["按下test_ok", "按下Ctrl+E键"]
+    EventSystem.bind_keyboard(None)
+
+def test_instances() -> None:
+    apps = [_App(), _App()]
+    buttons = [SimpleNamespace(executed=None), SimpleNamespace(executed=None)]
+    systems = [EventSystem(), EventSystem()]
+    for system, app, button in zip(systems, apps, buttons):
+        system.bind_all(app, None, None, buttons={'test_ok': button})
+    buttons[1].executed()
+    assert apps[0].calls == [] and apps[1].calls == ['ok']
+    EventSystem.register_button('test_other', SimpleNamespace(executed=None))
+    assert 'test_other' in EventSystem.default().handlers['buttons']
+    assert 'test_other' not in systems[0].handlers['buttons']
+
+class _Editor:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    @on_button('test_shared')
+    @on_combo('ctrl', 'shift', 'e')
+    def export(self) -> None:
+        self.calls.append('export')
+
+class _Viewer:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    @on_button('test_shared')
+    def show(self) -> None:
+        self.calls.append('show')
+
+class _SubViewer(_Viewer):
+    pass
+
+def test_owner_class() -> None:
+    viewer, editor = _SubViewer(), _Editor()
+    keyer = KeyboardHelper()
+    button = SimpleNamespace(executed=None)
+    system = EventSystem()
+    system.bind_all(viewer, None, keyer, buttons={'test_shared': button})
+    button.executed()
+    assert viewer.calls == ['show']
+    # 其他类声明的组合键不绑定到viewer
+    assert all(decorator.keys != ('ctrl', 'shift', 'e') for _, decorator, _ in system._bound_keys)
+    other = SimpleNamespace(executed=None)
+    EventSystem().bind_all(editor, None, None, buttons={'test_shared': other})
+    other.executed()
+    assert editor.calls == ['export'] and viewer.calls == ['show']
+    system.bind_keyboard(None)
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils import KeyboardHelper, KeyHistory
+
+def press(helper:KeyboardHelper, *names:str) -> None:
+    for name in names:
+        helper._on_press(SimpleNamespace(name=name))  # type: ignore
+
+def release(helper:KeyboardHelper, *names:str) -> None:
+    for name in names:
+        helper._on_release(SimpleNamespace(name=name))  # type: ignore
+
+@pytest.fixture
+def helper() -> KeyboardHelper:
+    return KeyboardHelper()
+
+def test_combo(helper:KeyboardHelper) -> None:
+    fired = []
+    helper.add_combo_handler('ctrl', 'q', handler=lambda: fired.append('ctrl+q'))
+    press(helper, 'left ctrl', 'q')
+    assert fired == ['ctrl+q']
+    press(helper, 'q')
+    assert fired == ['ctrl+q']
+    release(helper, 'q', 'left ctrl')
+    press(helper, 'q', 'ctrl')
+    assert fired == ['ctrl+q']
+
+def test_remove_combo(helper:KeyboardHelper) -> None:
+    fired = []
+    handler = lambda: fired.append(1)
+    helper.add_combo_handler('ctrl', 's', handler=handler)
+    helper.remove_combo_handler('ctrl', 's', handler=handler)
+    press(helper, 'ctrl', 's')
+    assert fired == []
+
+def test_sequence(helper:KeyboardHelper) -> None:
+    fired = []
+    helper.add_combo_handler('ctrl+k', 'ctrl+c', handler=lambda: fired.append('kc'))
+    helper.add_combo_handler('ctrl', 'c', handler=lambda: fired.append('c'))
+    press(helper, 'ctrl', 'k')
+    release(helper, 'k')
+    press(helper, 'c')
+    assert fired == ['kc']
+    release(helper, 'c')
+    press(helper, 'x')
+    release(helper, 'x')
+    press(helper, 'c')
+    assert fired == ['kc', 'c']
+
+def test_is_combo_pressed(helper:KeyboardHelper) -> None:
+    press(helper, 'shift', 'a')
+    assert helper.is_combo_pressed('shift', 'a')
+    assert not helper.is_combo_pressed('a', 'shift')
+
+def test_key_history() -> None:
+    history = KeyHistory(3)
+    assert history.last() is None
+    for i, key in enumerate('abcd'):
+        history.append(key, float(i))
+    assert history.snapshot() == [('b', 1.0), ('c', 2.0), ('d', 3.0)]
+    assert history.last() == ('d', 3.0)
+    history.clear()
+    assert len(history) == 0 and history.snapshot() == []
+    history.append('e', 4.0)
+    assert history.snapshot() == [('e', 4.0)]
+
+def test_key_history_write_in_progress() -> None:
+    history = KeyHistory(3)
+    for i, key in enumerate('abc'):
+        history.append(key, float(i))
+    # 写入方已写入键但尚未写时间戳和增加计数
+    history._keys[history._count % history._slots] = 'x'
+    assert history.snapshot() == [('a', 0.0), ('b', 1.0), ('c', 2.0)]
+
+def test_last_key(helper:KeyboardHelper) -> None:
+    press(helper, 'left shift', 'a')
+    assert helper.get_last_key() == 'a'
+    assert [key for key, _ in helper.get_key_history()] == ['shift', 'a']
+    helper.clear_combo_buffer()
+    assert helper.get_last_key() is None
+
+def test_pressed_keys(helper:KeyboardHelper) -> None:
+    press(helper, 'Right Ctrl', 'num 5', 'f13')
+    assert sorted(helper.get_all_pressed_keys()) == ['5', 'ctrl']
+    assert helper.is_key_pressed('left ctrl') and not helper.is_key_pressed('f13')
+    release(helper, 'right ctrl')
+    assert helper.get_all_pressed_keys() == ['5']
+    assert helper.get_last_key() == 'f13'
+
+def test_dispatcher(helper:KeyboardHelper) -> None:
+    fired = []
+    queued = []
+    helper.set_dispatcher(queued.append)
+    helper.add_combo_handler('ctrl', 'q', handler=lambda: fired.append('q'))
+    press(helper, 'ctrl', 'q')
+    assert fired == [] and len(queued) == 1
+    queued.pop()()
+    assert fired == ['q']
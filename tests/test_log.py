@@ -1,10 +1,45 @@
-from utils import LogSystem
+import threading
+from utils import LogSystem, INFO
 
-def test_info() -> None:
-    test = open("logs/test.log",'w')
-    testlog = LogSystem(test)
-    testlog.log_info("test")
-    test.close()
-    del testlog
-    test = open("logs/test.log",'r')
-    assert test.read()[-5:].strip() == 'test'
\ No newline at end of file
+def test_info(tmp_path) -> None:
+    path = tmp_path / "test.log"
+    with open(path, 'w') as test:
+        testlog = LogSystem(test)
+        testlog.log_info("test")
+    with open(path, 'r') as test:
+        assert test.read()[-5:].strip() == 'test'
+
+def test_buffered(tmp_path) -> None:
+    path = tmp_path / "test.log"
+    with open(path, 'w') as test:
+        testlog = LogSystem(test, buffered=True, level=INFO)
+        testlog.log_debug("hidden")
+        for i in range(100):
+            testlog.log_info(f"line{i}")
+        testlog.log_error("last")
+        testlog.close()
+    with open(path, 'r') as test:
+        lines = test.read().splitlines()
+    assert len(lines) == 101
+    assert lines[0].endswith("[INFO] line0")
+    assert lines[-1].endswith("[ERROR] last")
+
+def test_buffered_close_concurrent(tmp_path) -> None:
+    path = tmp_path / "test.log"
+    with open(path, 'w') as test:
+        testlog = LogSystem(test, buffered=True)
+        def worker(n: int) -> None:
+            for i in range(200):
+                testlog.log_info(f"{n}-{i}")
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        testlog.close()
+        for thread in threads:
+            thread.join()
+        testlog.log_info("after")
+    with open(path, 'r') as test:
+        lines = test.read().splitlines()
+    # close()前后写入的日志都不会丢失
+    assert len(lines) == 801
+    assert lines[-1].endswith("[INFO] after")
@@ -1,7 +1,13 @@
+import threading
+import time
+
 import pygame
 import pytest
 
-from stk import Label
+from stk import (
+    Button, Canvas, DensityPyramid, FrameProfiler, Game, GridIndex, Label, Manu, Minimap, TextCache, TileCache, Windows,
+    get_font
+)
 
 @pytest.fixture
 def game() -> pygame.Surface:
@@ -25,4 +31,340 @@ def test_Label_goto(labels:Label) -> None:
     labels.goto((0,0))
     assert labels.x == 0
     assert labels.y == 0
-    labels.goto((1,1))
\ No newline at end of file
+    labels.goto((1,1))
+
+def test_TextCache(game:pygame.Surface) -> None:
+    cache = TextCache(maxsize=2)
+    font = pygame.font.Font(None, 16)
+    first = cache.render(font, 'a', True, (0,0,0))
+    assert cache.render(font, 'a', True, (0,0,0)) is first
+    assert cache.get_stats()['hits'] == 1
+    assert cache.get_stats()['misses'] == 1
+    cache.render(font, 'b', True, (0,0,0))
+    cache.render(font, 'c', True, (0,0,0))
+    assert len(cache) == 2
+    assert cache.render(font, 'a', True, (0,0,0)) is not first
+
+
+def test_get_font(game:pygame.Surface) -> None:
+    assert get_font("Arial", 20) is get_font("Arial", 20)
+    assert get_font("Arial", 20) is not get_font("Arial", 21)
+
+
+def test_Windows_dirty() -> None:
+    win = Windows((100,100))
+    assert win.take_dirty() == (True, [])
+    win.add_dirty(pygame.Rect(0,0,10,10))
+    win.add_dirty(pygame.Rect(5,5,10,10))
+    win.add_dirty(pygame.Rect(50,50,10,10))
+    win.add_dirty(pygame.Rect(200,200,10,10))
+    full, rects = win.take_dirty()
+    assert not full
+    assert rects == [pygame.Rect(0,0,15,15), pygame.Rect(50,50,10,10)]
+    assert win.take_dirty() == (False, [])
+
+
+def test_Windows_dispatch() -> None:
+    win = Windows((200,200))
+    clicked = []
+    a = Button(win,'a',20,20,0,0,executed=lambda: clicked.append('a'))
+    b = Button(win,'b',20,20,100,100,executed=lambda: clicked.append('b'))
+    win.stk_event([a,b])
+    win.dispatch(pygame.event.Event(pygame.MOUSEMOTION,pos=(5,5)))
+    assert a.is_hovered and not b.is_hovered
+    win.dispatch(pygame.event.Event(pygame.MOUSEMOTION,pos=(105,105)))
+    assert not a.is_hovered and b.is_hovered
+    win.dispatch(pygame.event.Event(pygame.MOUSEBUTTONDOWN,pos=(105,105),button=1))
+    assert b.is_pressed
+    win.dispatch(pygame.event.Event(pygame.MOUSEBUTTONUP,pos=(5,5),button=1))
+    assert not b.is_pressed
+    assert clicked == []
+    b.goto((0,100))
+    win.dispatch(pygame.event.Event(pygame.MOUSEBUTTONDOWN,pos=(5,105),button=1))
+    win.dispatch(pygame.event.Event(pygame.MOUSEBUTTONUP,pos=(5,105),button=1))
+    assert clicked == ['b']
+
+
+def test_GridIndex() -> None:
+    index = GridIndex(cell_size=10)
+    index.insert('a', pygame.Rect(0,0,5,5))
+    index.insert('b', pygame.Rect(8,8,20,20))
+    assert index.query_point((2,2)) == ['a']
+    assert index.query_point((9,9)) == ['b']
+    assert sorted(index.query_rect(pygame.Rect(0,0,10,10))) == ['a','b']
+    index.move('a', pygame.Rect(100,100,5,5))
+    assert index.query_point((2,2)) == []
+    assert index.query_rect((95,95,10,10)) == ['a']
+    index.remove('b')
+    assert index.query_point((9,9)) == []
+    assert len(index) == 1
+
+
+def test_Windows_call_soon() -> None:
+    win = Windows((10,10))
+    win.set_idle(True, timeout=5000)
+    win.calls_per_frame = 2
+    called = []
+    thread = threading.Thread(target=lambda: [win.call_soon(lambda i=i: called.append(i)) for i in range(3)])
+    start = time.perf_counter()
+    thread.start()
+    thread.join()
+    assert win.running()
+    assert time.perf_counter() - start < 1
+    assert called == [0, 1]
+    assert win.get_call_stats()['pending'] == 1
+    assert not win._should_wait()
+    win.running()
+    assert called == [0, 1, 2]
+    assert win.get_call_stats()['calls'] == 3
+
+
+
+def test_Windows_idle() -> None:
+    win = Windows((10,10), headless=True)
+    win.set_idle(True, timeout=200)
+    win.take_dirty()
+    pygame.event.clear()
+    # 没有事件和待绘制内容时最多等待idle_timeout
+    start = time.perf_counter()
+    assert win.running()
+    assert 0.1 < time.perf_counter() - start < 0.5
+    # 已有事件或脏矩形时立即返回
+    pygame.event.post(pygame.event.Event(pygame.USEREVENT))
+    start = time.perf_counter()
+    assert win.running()
+    assert time.perf_counter() - start < 0.1
+    win.add_dirty(pygame.Rect(0,0,5,5))
+    assert not win._should_wait()
+    start = time.perf_counter()
+    assert win.running()
+    assert time.perf_counter() - start < 0.1
+    # 等待期间其他线程投递的事件会唤醒主循环
+    timer = threading.Timer(0.05, lambda: pygame.event.post(pygame.event.Event(pygame.USEREVENT)))
+    win.take_dirty()
+    start = time.perf_counter()
+    timer.start()
+    assert win.running()
+    timer.join()
+    assert time.perf_counter() - start < 0.15
+    # 不使用脏矩形绘制的Game每帧整窗重绘后同样进入等待
+    game = Game(headless=True)
+    game.window.set_idle(True, timeout=200)
+    game.run(frames=1)
+    start = time.perf_counter()
+    game.run(frames=1)
+    assert 0.1 < time.perf_counter() - start < 0.5
+
+def test_Game_headless(tmp_path) -> None:
+    game = Game(headless=True)
+    game.window.update_window((120,80))
+    game.stks = [Label(game.window,'x',40,20,10,10)]
+    game.run(frames=3)
+    assert game.running and game.window.frames == 3 and game.window.presents == 3
+    assert game.window.get_window().get_at((0,0))[:3] == game.color
+    game.window.export(str(tmp_path / 'out.png'))
+    assert pygame.image.load(str(tmp_path / 'out.png')).get_size() == (120,80)
+
+
+def test_FrameProfiler() -> None:
+    game = Game(headless=True)
+    assert not game.profiler.enabled
+    game.stks = [Label(game.window,'x',40,20,10,10)]
+    game.toggle_profiler()
+    game.run(frames=5)
+    stats = game.profiler.get_stats()
+    assert {'frame','draw','present','check'} <= set(stats)
+    assert game.profiler.frames == 5
+    assert stats['frame']['p50'] <= stats['frame']['p99'] <= stats['frame']['max']
+    # 每个组件的事件处理单独计时，嵌套的区段不重复计入'frame'
+    game.stks = [Button(game.window,'b',20,20,10,10)]
+    game.window.stk_event(game.stks)
+    game.profiler.reset()
+    pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=(15,15), rel=(0,0), buttons=(0,0,0)))
+    game.run(frames=1)
+    stats = game.profiler.get_stats()
+    assert 'check:Button' in stats
+    assert stats['check:Button']['max'] <= stats['check']['max']
+    assert stats['frame']['max'] == pytest.approx(sum(stats[name]['max'] for name in stats
+                                                      if name != 'frame' and ':' not in name))
+    # 隐藏叠加层后不再统计
+    game.toggle_profiler()
+    game.profiler.reset()
+    game.run(frames=2)
+    assert not game.profiler.enabled and game.profiler.get_stats() == {}
+    profiler = FrameProfiler(enabled=False)
+    with profiler.section('x'):
+        pass
+    profiler.end_frame()
+    assert profiler.get_stats() == {}
+
+
+def test_Button_surfaces() -> None:
+    win = Windows((100,100), headless=True)
+    button = Button(win,'a',20,20,10,10)
+    button.draw()
+    normal = button._surfaces['normal']
+    button.is_hovered = True
+    button.draw()
+    button.draw()
+    assert button._surfaces['normal'] is normal and 'hover' in button._surfaces
+    button.hover_background = (0,0,255)
+    button.draw()
+    assert 'normal' not in button._surfaces
+    assert win.get_window().get_at((20,12))[:3] == (0,0,255)
+    assert button.background == (0,0,255)
+
+
+def test_Button_text_overflow() -> None:
+    win = Windows((300,60), headless=True)
+    screen = win.get_window()
+    screen.fill((10,200,30))
+    button = Button(win, "a rather long caption", 40, 20, 130, 20, fontsize=20)
+    text = button._text_rect()
+    assert text.width > 40 and button.get_bounds().contains(text)
+    button.draw()
+    # 超出按钮的文字照常画在窗口上
+    outside = [screen.get_at((x, y))[:3] for x in range(text.left, 120) for y in range(text.top, text.bottom)]
+    assert any(color != (10,200,30) for color in outside)
+
+
+def test_Canvas() -> None:
+    from core import Document
+    win = Windows((200,200), headless=True)
+    doc = Document()
+    a = doc.add_node(1, 10, 10, 40, 20, 'a')
+    b = doc.add_node(1, 1000, 1000, 40, 20, 'b')
+    doc.add_edge(a, b)
+    canvas = Canvas(win, 0, 0, 200, 200, document=doc)
+    assert canvas.visible_nodes() == [a]
+    assert len(canvas.visible_edges()) == 1
+    assert canvas.screen_to_world(*canvas.world_to_screen(123, 45)) == (123, 45)
+    canvas.zoom_at(2, (30, 20))
+    assert canvas.screen_to_world(30, 20) == (30, 20)
+    canvas.center_on(1020, 1010)
+    assert canvas.visible_nodes() == [b]
+    doc.move_node(a, 1050, 1050)
+    assert canvas.visible_nodes() == [a, b]
+    win.take_dirty()
+    canvas.check(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(100,100), button=1))
+    canvas.check(pygame.event.Event(pygame.MOUSEMOTION, pos=(80,100), rel=(-20,0), buttons=(1,0,0)))
+    assert canvas.view_x == 1020 - 50 + 10
+    assert win.take_dirty() == (False, [pygame.Rect(0,0,200,200)])
+    canvas.draw()
+    doc.remove_node(b)
+    assert canvas.visible_nodes() == [a] and canvas.visible_edges() == []
+
+
+def test_TileCache() -> None:
+    cache = TileCache(budget_mb=0.75, tile_size=256)  # 3个256×256×4字节的瓦片
+    for tx in range(4):
+        cache.put((1.0, tx, 0), pygame.Surface((256,256), 0, 32))
+    assert (1.0, 0, 0) not in cache and len(cache) == 3
+    assert cache.get((1.0, 1, 0)) is not None and cache.get((1.0, 0, 0)) is None
+    cache.put((0.5, 0, 0), pygame.Surface((256,256), 0, 32))
+    assert (1.0, 2, 0) not in cache
+    epoch = cache.epoch
+    cache.invalidate(pygame.Rect(300, 10, 20, 20))
+    assert cache.epoch == epoch + 1
+    assert list(cache) == [(1.0, 3, 0)]
+
+
+def test_Canvas_tiles() -> None:
+    from core import Document
+    win = Windows((200,200), headless=True)
+    doc = Document()
+    a = doc.add_node(1, 10, 10, 40, 20, 'a')
+    b = doc.add_node(1, 300, 10, 40, 20, 'b')
+    direct = Canvas(win, 0, 0, 200, 200, document=doc, tile_budget_mb=0)
+    direct.draw()
+    expected = pygame.image.tobytes(win.get_window(), 'RGB')
+    canvas = Canvas(win, 0, 0, 200, 200, document=doc, prefetch=0)
+    canvas.draw()
+    assert pygame.image.tobytes(win.get_window(), 'RGB') == expected
+    assert (1.0, 0, 0) in canvas.tiles
+    canvas.pan(-256, 0)
+    canvas.draw()
+    assert (1.0, 1, 0) in canvas.tiles
+    doc.move_node(b, 310, 10)
+    assert (1.0, 0, 0) in canvas.tiles and (1.0, 1, 0) not in canvas.tiles
+    canvas.close()
+    direct.unbind()
+    canvas.unbind()
+
+
+def test_DensityPyramid() -> None:
+    pyramid = DensityPyramid(cell_size=64, levels=4)
+    pyramid.add(pygame.Rect(0, 0, 32, 32))
+    pyramid.add(pygame.Rect(100, 0, 32, 32))
+    assert len(pyramid) == 2
+    assert pyramid.level_for(1.0, 8) == 0 and pyramid.level_for(0.03, 8) == 3
+    assert sorted(pyramid.cells(0, pygame.Rect(0, 0, 500, 500))) == [(0, 0, 1, 0.25), (1, 0, 1, 0.25)]
+    assert list(pyramid.cells(1, pygame.Rect(0, 0, 500, 500))) == [(0, 0, 2, 2048 / 128 ** 2)]
+    version = pyramid.version
+    pyramid.remove(pygame.Rect(0, 0, 32, 32))
+    assert pyramid.version > version
+    assert list(pyramid.cells(1, pygame.Rect(0, 0, 500, 500))) == [(0, 0, 1, 1024 / 128 ** 2)]
+
+
+def test_Canvas_lod() -> None:
+    from core import Document
+    win = Windows((200,200), headless=True)
+    doc = Document()
+    a = doc.add_node(1, 0, 0, 2000, 2000, 'a')
+    canvas = Canvas(win, 0, 0, 200, 200, document=doc, text_zoom=0.5, box_zoom=0.05)
+    assert canvas.lod() == 'full'
+    canvas.zoom_at(0.25)
+    assert canvas.lod() == 'box' and canvas._font(canvas.zoom) is None
+    canvas.center_on(1000, 1000)
+    canvas.draw()
+    assert win.get_window().get_at((100,100))[:3] == (235,235,250)
+    canvas.zoom_at(0.1)
+    assert canvas.lod() == 'density'
+    canvas.draw()
+    assert win.get_window().get_at((100,100))[:3] == canvas._shade(1.0)
+    doc.remove_node(a)
+    canvas.draw()
+    assert win.get_window().get_at((100,100))[:3] == (255,255,255)
+    with pytest.raises(ValueError):
+        canvas.set_lod(0.1, 0.2)
+    canvas.close()
+
+
+def test_Minimap() -> None:
+    from core import Document
+    win = Windows((300,200), headless=True)
+    doc = Document()
+    a = doc.add_node(1, 0, 0, 100, 50, 'a')
+    doc.add_node(1, 1000, 500, 100, 50, 'b')
+    canvas = Canvas(win, 0, 0, 200, 200, document=doc, prefetch=0)
+    minimap = Minimap(win, canvas, 200, 0, 100, 100)
+    world = minimap._world
+    doc.move_node(a, 400, 300)
+    doc.add_node(1, 600, 100, 100, 50, 'c')
+    assert minimap._world == world
+    overview = pygame.image.tobytes(minimap._overview, 'RGB')
+    minimap._render()
+    assert pygame.image.tobytes(minimap._overview, 'RGB') == overview
+    doc.add_node(1, 5000, 5000, 10, 10, 'd')
+    assert minimap._world.contains((5000, 5000, 10, 10))
+    minimap.draw()
+    win.take_dirty()
+    canvas.pan(-1, 0)
+    assert win.take_dirty() == (False, [pygame.Rect(0,0,200,200)])
+    minimap.check(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(250,50), button=1))
+    center = canvas.screen_to_world(*canvas.rect.center)
+    assert center == pytest.approx(minimap.local_to_world(50, 50))
+    minimap.close()
+    canvas.close()
+
+
+def test_Manu_moved_button() -> None:
+    win = Windows((400,400), headless=True)
+    pressed: list[int] = []
+    menu = Manu(win, 30, 2, ['a', 'b'], 50, executeds=[lambda: pressed.append(0), lambda: pressed.append(1)],
+                annotations=[None, None], fontsize=14)
+    win.stk_event([menu])
+    menu.buttons[1].goto((300, 300))
+    for event_type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        win.dispatch(pygame.event.Event(event_type, pos=(310, 310), button=1))
+    assert pressed == [1]
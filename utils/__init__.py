@@ -1,3 +1,5 @@
 from .log_write import *
+from .combo_matcher import *
+from .key_history import *
 from .keyboard_helper import *
 from .event_decorators import *
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+组合键匹配器
+把组合键编译成以"和弦"为边的前缀树，每次按键只沿当前活跃的状态前进一步。
+
+组合键由一个或多个步骤组成，每个步骤是一组按顺序按下的键（和弦），
+例如 ('ctrl', 'q') 是一个步骤，('ctrl+k', 'ctrl+c') 是两个步骤的序列。
+键用整数编码表示，按下的键是以编码为位的位集。
+"""
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+Step = Tuple[int, ...]
+Steps = Tuple[Step, ...]
+Handler = Callable[[], Any]
+
+class _Node:
+    """前缀树节点"""
+    __slots__ = ('children', 'handlers')
+
+    def __init__(self) -> None:
+        # 触发键 -> [(需要按住的键, 其位掩码, 子节点)]
+        self.children: Dict[int, List[Tuple[Step, int, '_Node']]] = {}
+        self.handlers: List[Handler] = []
+
+def key_mask(keys: Iterable[int]) -> int:
+    """键编码集合对应的位掩码"""
+    mask = 0
+    for key in keys:
+        mask |= 1 << key
+    return mask
+
+def parse_combo(keys: Iterable[str], normalize: Callable[[str], int]) -> Steps:
+    """
+    把 add_combo_handler 的参数转换成步骤，normalize把键名转换为编码
+    参数中出现'+'时每个参数是一个步骤（如 'ctrl+k', 'ctrl+c'），否则所有参数组成一个步骤
+    """
+    keys = [key.strip().lower() for key in keys]
+    if any('+' in key and key != '+' for key in keys):
+        return tuple(
+            tuple(normalize(part.strip()) for part in key.split('+') if part.strip())
+            for key in keys
+        )
+    return (tuple(normalize(key) for key in keys),)
+
+class ComboMatcher:
+    """增量匹配组合键与多步序列"""
+    def __init__(self, max_interval: float = 0.5) -> None:
+        self.max_interval = max_interval
+        self._root = _Node()
+        self._pending: List[Tuple[_Node, float]] = []  # 已完成部分步骤的序列及最后一步的时间
+
+    def add(self, steps: Steps, handler: Handler) -> None:
+        """注册组合键"""
+        node = self._root
+        for step in steps:
+            held, trigger = step[:-1], step[-1]
+            branches = node.children.setdefault(trigger, [])
+            for branch_held, _, child in branches:
+                if branch_held == held:
+                    node = child
+                    break
+            else:
+                child = _Node()
+                branches.append((held, key_mask(held), child))
+                node = child
+        node.handlers.append(handler)
+
+    def remove(self, steps: Steps, handler: Handler) -> bool:
+        """移除组合键，并删除不再使用的节点；返回是否找到"""
+        path: List[Tuple[_Node, int, int]] = []
+        node = self._root
+        for step in steps:
+            held, trigger = step[:-1], step[-1]
+            branches = node.children.get(trigger, [])
+            for i, (branch_held, _, child) in enumerate(branches):
+                if branch_held == held:
+                    path.append((node, trigger, i))
+                    node = child
+                    break
+            else:
+                return False
+        if handler not in node.handlers:
+            return False
+        node.handlers.remove(handler)
+        for parent, trigger, i in reversed(path):
+            child = parent.children[trigger][i][2]
+            if child.handlers or child.children:
+                break
+            del parent.children[trigger][i]
+            if not parent.children[trigger]:
+                del parent.children[trigger]
+        self._pending.clear()
+        return True
+
+    def chord_in_order(
+            self,
+            held: Step,
+            now: float,
+            pressed: int,
+            press_times: Mapping[int, float],
+            held_mask: Optional[int] = None
+        ) -> bool:
+        """held中的键都按着，且与当前按键一起按顺序、在时间间隔内按下"""
+        if held_mask is None:
+            held_mask = key_mask(held)
+        if pressed & held_mask != held_mask:
+            return False
+        prev = None
+        for key in held:
+            t = press_times[key]
+            if prev is not None and (t < prev or t - prev > self.max_interval):
+                return False
+            prev = t
+        return prev is None or (prev <= now and now - prev <= self.max_interval)
+
+    def feed(
+            self,
+            key: int,
+            now: float,
+            pressed: int,
+            press_times: Mapping[int, float],
+            is_modifier: bool = False
+        ) -> List[Handler]:
+        """
+        处理一次按键，返回需要触发的处理函数
+        序列的第一步按 chord_in_order 检查；之后的步骤只要求和弦中的键仍按着，
+        且与上一步的间隔不超过 max_interval。推进了进行中序列的按键不再匹配新的组合键。
+        """
+        handlers: List[Handler] = []
+        pending: List[Tuple[_Node, float]] = []
+        states: List[Tuple[_Node, Optional[float]]] = [
+            (node, t) for node, t in self._pending if now - t <= self.max_interval
+        ]
+        states.append((self._root, None))
+        consumed = False
+        for node, since in states:
+            if since is None and consumed:
+                # 按键已被进行中的序列使用，不再作为新组合键的开始
+                break
+            advanced = False
+            for held, held_mask, child in node.children.get(key, ()):
+                if since is None:
+                    if not self.chord_in_order(held, now, pressed, press_times, held_mask):
+                        continue
+                elif pressed & held_mask != held_mask:
+                    continue
+                advanced = consumed = True
+                handlers.extend(child.handlers)
+                if child.children:
+                    pending.append((child, now))
+            if since is not None and not advanced and is_modifier:
+                # 按下修饰键不打断正在进行的序列
+                pending.append((node, since))
+        self._pending = pending
+        return handlers
+
+    def reset(self) -> None:
+        """丢弃进行中的序列"""
+        self._pending.clear()
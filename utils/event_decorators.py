@@ -4,10 +4,12 @@
 """
 
 import functools
-from typing import Callable, Any, Dict, Optional, List
+import weakref
+from typing import Callable, Any, Dict, Optional, List, Tuple
 
-# 全局事件注册表
-_event_registry: Dict[str, Dict[str, Dict[str, Any]]] = {
+# 全局事件注册表，保存装饰器声明的事件，由所有事件系统实例共享
+# 同一目标可以由不同的类声明，每个目标对应一个声明列表，绑定时只取属于应用所在类的声明
+_event_registry: Dict[str, Dict[str, List[Dict[str, Any]]]] = {
     'button': {},      # 按钮事件注册表
     'key': {},         # 单键事件注册表
     'combo': {},       # 组合键事件注册表
@@ -15,58 +17,33 @@ _event_registry: Dict[str, Dict[str, Dict[str, Any]]] = {
     'custom': {}       # 自定义事件注册表
 }
 
-# 用于存储事件处理器实例的全局变量
-_event_handlers: Dict[str, Any] = {
-    'buttons': {},     # 按钮实例
-    'keyboard': None,  # 键盘助手实例
-    'log': None,       # 日志系统实例
-    'app': None        # 应用实例
-}
-
-# 菜单注册表
-_menu_registry: Dict[str, Dict[int, Any]] = {}
+# 所有事件系统实例，声明新的按钮事件时绑定到各实例已注册的按钮
+_systems: 'weakref.WeakSet[EventSystem]' = weakref.WeakSet()
 
 
 def register_event_handler(type_name: str, handler: Any, name: Optional[str] = None) -> None:
-    """注册事件处理器"""
+    """注册事件处理器（默认事件系统）"""
+    handlers = EventSystem.default().handlers
     if type_name == 'button':
         if name is None:
             raise ValueError("按钮处理器必须指定名称")
-        _event_handlers['buttons'][name] = handler
+        handlers['buttons'][name] = handler
     elif type_name == 'keyboard':
-        _event_handlers['keyboard'] = handler
+        handlers['keyboard'] = handler
     elif type_name == 'log':
-        _event_handlers['log'] = handler
+        handlers['log'] = handler
     elif type_name == 'app':
-        _event_handlers['app'] = handler
+        handlers['app'] = handler
 
 
 def register_menu(menu_name: str) -> None:
-    """注册菜单实例"""
-    if menu_name not in _menu_registry:
-        _menu_registry[menu_name] = {}
+    """注册菜单实例（默认事件系统）"""
+    EventSystem.default().register_menu(menu_name)
 
 
 def register_menu_button(menu_name: str, button_index: int, button_instance: Any) -> None:
-    """注册菜单中的按钮"""
-    if menu_name not in _menu_registry:
-        _menu_registry[menu_name] = {}
-    _menu_registry[menu_name][button_index] = button_instance
-    
-    # 为这个按钮创建一个唯一的ID，并注册到按钮注册表
-    button_id = f"{menu_name}_{button_index}"
-    _event_handlers['buttons'][button_id] = button_instance
-    
-    # 检查是否有已注册的事件需要绑定到这个按钮
-    if button_id in _event_registry['button']:
-        event_info = _event_registry['button'][button_id]
-        original_func = event_info['original']
-        decorator = event_info['decorator']
-        app_instance = _event_handlers['app']
-        
-        button_instance.executed = lambda: decorator._execute_with_context(
-            original_func, app_instance
-        )
+    """注册菜单中的按钮（默认事件系统）"""
+    EventSystem.default().register_menu_button(menu_name, button_index, button_instance)
 
 
 class EventDecorator:
@@ -87,40 +64,46 @@ class EventDecorator:
         self.event_type = event_type
         self.target = target
         
-    def _log_event(self, func_name: str, *args: Any, **kwargs: Any) -> None:
-        """记录事件日志"""
-        if _event_handlers['log'] and self.log_message:
-            log_system = _event_handlers['log']
-            try:
-                # 构建日志上下文
-                context: Dict[str, Any] = {
-                    'func_name': func_name,
-                    'args': args,
-                    'kwargs': kwargs,
-                    'target': self.target,
-                    'event_type': self.event_type
-                }
-                
-                # 格式化日志消息
-                log_msg: Any = self.log_message
-                if callable(log_msg):
-                    log_msg = log_msg(*args, **kwargs)
-                elif isinstance(log_msg, str):
-                    log_msg = log_msg.format(**context)
-                    
-                log_system.log_info(log_msg)
-            except Exception:
-                # 如果格式化失败，使用默认消息
-                default_msg = f"{self.event_type}事件触发: {func_name}"
-                log_system.log_info(default_msg)
+    def _format_message(self, func_name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        """生成日志消息，失败时使用默认消息"""
+        try:
+            log_msg: Any = self.log_message
+            if callable(log_msg):
+                return log_msg(*args, **kwargs)
+            if isinstance(log_msg, str):
+                # 构建日志上下文并格式化
+                return log_msg.format(
+                    func_name=func_name,
+                    args=args,
+                    kwargs=kwargs,
+                    target=self.target,
+                    event_type=self.event_type
+                )
+            return log_msg
+        except Exception:
+            return f"{self.event_type}事件触发: {func_name}"
     
-    def _execute_with_context(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
-        """在上下文中执行函数"""
-        # 记录日志
-        self._log_event(func.__name__, *args, **kwargs)
-        
-        # 执行原始函数
-        return func(*args, **kwargs)
+    def compile(self, func: Callable[..., Any], *args: Any, log_system: Any = None) -> Callable[[], Any]:
+        """
+        把处理函数和参数编译成无参可调用对象
+        没有日志系统时直接返回partial；字符串日志模板在此时格式化一次
+        """
+        call = functools.partial(func, *args)
+        if log_system is None or not self.log_message:
+            return call
+        log_info = log_system.log_info
+        if callable(self.log_message):
+            # 消息依赖调用时的状态，每次调用时生成
+            format_message = functools.partial(self._format_message, func.__name__, args, {})
+            def handler() -> Any:
+                log_info(format_message())
+                return call()
+        else:
+            message = self._format_message(func.__name__, args, {})
+            def handler() -> Any:
+                log_info(message)
+                return call()
+        return handler
     
     def __call__(self, func: Callable[..., Any]) -> Callable[..., Any]:
         """装饰器调用 - 返回原始函数，只注册事件"""
@@ -134,10 +117,17 @@ class EventDecorator:
         """注册事件到全局注册表"""
         key = self._get_registry_key()
         if key:
-            _event_registry[self.event_type][key] = {
+            entries = _event_registry[self.event_type].setdefault(key, [])
+            # 同一函数再次声明（如重新加载模块）时替换旧的声明
+            entries[:] = [
+                entry for entry in entries
+                if (entry['original'].__module__, entry['original'].__qualname__)
+                != (original_func.__module__, original_func.__qualname__)
+            ]
+            entries.append({
                 'original': original_func,
                 'decorator': self
-            }
+            })
     
     def _get_registry_key(self) -> Optional[str]:
         """获取注册表键"""
@@ -168,11 +158,11 @@ class ButtonEvent(EventDecorator):
         super()._register_event(original_func, wrapped_func)
         
         # 立即绑定到按钮（如果按钮已注册）
-        if self.target and self.target in _event_handlers['buttons']:
-            button = _event_handlers['buttons'][self.target]
-            app_instance = _event_handlers['app']
-            # 绑定到按钮的executed回调
-            button.executed = lambda: self._execute_with_context(original_func, app_instance)
+        if self.target:
+            for system in list(_systems):
+                button = system.handlers['buttons'].get(self.target)
+                if button is not None:
+                    system._bind_button(self.target, button)
 
 
 class MenuButtonEvent(ButtonEvent):
@@ -205,7 +195,8 @@ class KeyEvent(EventDecorator):
     """键盘事件装饰器"""
     
     def __init__(self, key_name: str, log_message: Optional[str] = None, 
-                 is_combo: bool = False, **kwargs: Any) -> None:
+                 is_combo: bool = False, keys: Optional[Tuple[str, ...]] = None,
+                 **kwargs: Any) -> None:
         """
         初始化键盘事件装饰器
         
@@ -213,6 +204,7 @@ class KeyEvent(EventDecorator):
             key_name: 按键名称（或组合键，用'+'分隔）
             log_message: 日志消息
             is_combo: 是否为组合键
+            keys: 传给 add_combo_handler 的参数，默认由key_name按'+'拆分
             **kwargs: 传递给基类的其他参数
         """
         log_msg = log_message or f"按键 '{key_name}' 被按下"
@@ -225,74 +217,186 @@ class KeyEvent(EventDecorator):
             **kwargs
         )
         self.is_combo = is_combo
+        self.keys = keys if keys is not None else tuple(key_name.split('+'))
+    
+    def bind(self, keyboard_helper: Any, handler: Callable[[], Any]) -> None:
+        """把处理函数注册到键盘助手"""
+        if self.is_combo:
+            keyboard_helper.add_combo_handler(*self.keys, handler=handler)
+        else:
+            keyboard_helper.add_key_handler(self.target, handler)
+    
+    def unbind(self, keyboard_helper: Any, handler: Callable[[], Any]) -> None:
+        """从键盘助手移除处理函数"""
+        if self.is_combo:
+            keyboard_helper.remove_combo_handler(*self.keys, handler=handler)
+        else:
+            keyboard_helper.remove_key_handler(self.target, handler)
+
+
+class _system_method:
+    """在类上访问时绑定到默认实例的方法"""
+    def __init__(self, func: Callable[..., Any]) -> None:
+        self.func = func
+        self.__doc__ = func.__doc__
+    
+    def __get__(self, instance: Any, owner: Any) -> Callable[..., Any]:
+        if instance is None:
+            instance = owner.default()
+        return self.func.__get__(instance, owner)
 
 
 # 事件系统管理器
 class EventSystem:
-    """事件系统管理器"""
+    """
+    事件系统管理器
+    
+    每个实例保存自己的应用、日志系统、键盘助手和按钮绑定，装饰器声明的事件由所有实例共享，
+    但只绑定声明在应用所在类（含基类）中的事件，子类的声明优先；
+    直接在类上调用方法（如 EventSystem.bind_all(...)）时作用于默认实例。
+    """
+    _default: Optional['EventSystem'] = None
+    
+    def __init__(self) -> None:
+        # 事件处理器实例
+        self.handlers: Dict[str, Any] = {
+            'buttons': {},     # 按钮实例
+            'keyboard': None,  # 键盘助手实例
+            'log': None,       # 日志系统实例
+            'app': None        # 应用实例
+        }
+        # 菜单注册表
+        self.menus: Dict[str, Dict[int, Any]] = {}
+        # 已绑定到键盘助手的处理函数：(键盘助手, 装饰器, 编译后的处理函数)
+        self._bound_keys: List[Tuple[Any, 'KeyEvent', Callable[[], Any]]] = []
+        _systems.add(self)
     
     @staticmethod
-    def bind_app(app_instance: Any) -> None:
+    def default() -> 'EventSystem':
+        """默认实例，模块级函数和类上的调用都使用它"""
+        if EventSystem._default is None:
+            EventSystem._default = EventSystem()
+        return EventSystem._default
+    
+    @_system_method
+    def bind_app(self, app_instance: Any) -> None:
         """绑定应用实例"""
-        _event_handlers['app'] = app_instance
+        self.handlers['app'] = app_instance
+        self.compile()
         
-    @staticmethod
-    def bind_log(log_system: Any) -> None:
+    @_system_method
+    def bind_log(self, log_system: Any) -> None:
         """绑定日志系统"""
-        _event_handlers['log'] = log_system
+        self.handlers['log'] = log_system
+        self.compile()
         
-    @staticmethod
-    def bind_keyboard(keyboard_helper: Any) -> None:
+    @_system_method
+    def bind_keyboard(self, keyboard_helper: Any) -> None:
         """绑定键盘助手"""
-        _event_handlers['keyboard'] = keyboard_helper
+        self.handlers['keyboard'] = keyboard_helper
+        self._bind_keys(keyboard_helper)
         
-    @staticmethod
-    def register_button(button_name: str, button_instance: Any) -> None:
+    @_system_method
+    def register_button(self, button_name: str, button_instance: Any) -> None:
         """注册按钮实例"""
-        _event_handlers['buttons'][button_name] = button_instance
+        self.handlers['buttons'][button_name] = button_instance
         
         # 自动绑定已注册的按钮事件
-        if button_name in _event_registry['button']:
-            event_info = _event_registry['button'][button_name]
-            original_func = event_info['original']
-            decorator = event_info['decorator']
-            app_instance = _event_handlers['app']
-            
-            button_instance.executed = lambda: decorator._execute_with_context(
-                original_func, app_instance
-            )
+        self._bind_button(button_name, button_instance)
     
-    @staticmethod
-    def register_menu(menu_name: str) -> None:
+    @_system_method
+    def register_menu(self, menu_name: str) -> None:
         """注册菜单实例（只注册菜单名，不注册按钮）"""
-        register_menu(menu_name)
+        if menu_name not in self.menus:
+            self.menus[menu_name] = {}
     
-    @staticmethod
-    def register_menu_buttons(menu_name: str, buttons: List[Any]) -> None:
+    @_system_method
+    def register_menu_button(self, menu_name: str, button_index: int, button_instance: Any) -> None:
+        """注册菜单中的按钮"""
+        self.register_menu(menu_name)
+        self.menus[menu_name][button_index] = button_instance
+        
+        # 为这个按钮创建一个唯一的ID，并注册到按钮注册表
+        self.register_button(f"{menu_name}_{button_index}", button_instance)
+    
+    @_system_method
+    def register_menu_buttons(self, menu_name: str, buttons: List[Any]) -> None:
         """注册菜单中的所有按钮"""
-        register_menu(menu_name)
+        self.register_menu(menu_name)
         for i, button in enumerate(buttons):
-            register_menu_button(menu_name, i, button)
+            self.register_menu_button(menu_name, i, button)
     
-    @staticmethod
-    def bind_all(app_instance: Any, log_system: Any, keyboard_helper: Any, 
+    @_system_method
+    def bind_all(self, app_instance: Any, log_system: Any, keyboard_helper: Any, 
                  buttons: Optional[Dict[str, Any]] = None,
                  menus: Optional[Dict[str, List[Any]]] = None) -> None:
         """一键绑定所有处理器"""
-        EventSystem.bind_app(app_instance)
-        EventSystem.bind_log(log_system)
-        EventSystem.bind_keyboard(keyboard_helper)
+        self.handlers['app'] = app_instance
+        self.handlers['log'] = log_system
+        self.handlers['keyboard'] = keyboard_helper
+        # 应用或日志系统可能已改变，重新编译之前注册的按钮并绑定键盘
+        self.compile()
         
-        if buttons:
-            for name, button in buttons.items():
-                EventSystem.register_button(name, button)
+        for button_name, button_instance in (buttons or {}).items():
+            self.register_button(button_name, button_instance)
         
-        if menus:
-            for menu_name, menu_buttons in menus.items():
-                EventSystem.register_menu_buttons(menu_name, menu_buttons)
+        for menu_name, menu_buttons in (menus or {}).items():
+            self.register_menu_buttons(menu_name, menu_buttons)
+    
+    @_system_method
+    def compile(self) -> None:
+        """
+        把已注册的事件编译成无参可调用对象，绑定到按钮和键盘助手
+        绑定的应用或日志系统改变后需要重新编译
+        """
+        for button_id, button_instance in self.handlers['buttons'].items():
+            self._bind_button(button_id, button_instance)
+        self._bind_keys(self.handlers['keyboard'])
+    
+    def _compile_event(self, event_info: Dict[str, Any]) -> Callable[[], Any]:
+        return event_info['decorator'].compile(
+            event_info['original'], self.handlers['app'], log_system=self.handlers['log']
+        )
+    
+    def _find_event(self, event_type: str, key: str) -> Optional[Dict[str, Any]]:
+        """在应用所在类的MRO中找到该目标的声明，子类优先；不属于应用的声明被忽略"""
+        app = self.handlers['app']
+        entries = _event_registry[event_type].get(key)
+        if app is None or not entries:
+            return None
+        for cls in type(app).__mro__:
+            members = vars(cls)
+            for entry in entries:
+                func = entry['original']
+                if members.get(func.__name__) is func:
+                    return entry
+        return None
+    
+    def _bind_button(self, button_id: str, button_instance: Any) -> None:
+        """把已注册的按钮事件编译后绑定到按钮"""
+        event_info = self._find_event('button', button_id)
+        if event_info is not None:
+            button_instance.executed = self._compile_event(event_info)
+    
+    def _bind_keys(self, keyboard_helper: Any) -> None:
+        """把已注册的按键和组合键事件编译后绑定到键盘助手，替换之前绑定的"""
+        for helper, decorator, handler in self._bound_keys:
+            decorator.unbind(helper, handler)
+        self._bound_keys.clear()
+        if keyboard_helper is None:
+            return
+        for event_type in ('key', 'combo'):
+            for key in _event_registry[event_type]:
+                event_info = self._find_event(event_type, key)
+                if event_info is None:
+                    continue
+                decorator = event_info['decorator']
+                handler = self._compile_event(event_info)
+                decorator.bind(keyboard_helper, handler)
+                self._bound_keys.append((keyboard_helper, decorator, handler))
     
     @staticmethod
-    def get_registered_events() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    def get_registered_events() -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
         """获取所有已注册的事件"""
         return _event_registry
     
@@ -323,7 +427,7 @@ def on_key(key_name: str, log_message: Optional[str] = None) -> 'KeyEvent':
 def on_combo(*keys: str, log_message: Optional[str] = None) -> KeyEvent:
     """组合键事件装饰器工厂函数"""
     key_name = '+'.join(keys)
-    return KeyEvent(key_name, log_message, is_combo=True)
+    return KeyEvent(key_name, log_message, is_combo=True, keys=keys)
 
 
 # 高级装饰器
@@ -368,7 +472,7 @@ def retry_on_event(max_retries: int = 3, delay: float = 0.1) -> Callable[[Callab
                 except Exception as e:
                     if attempt == max_retries - 1:
                         raise e
-                    log_system = _event_handlers['log']
+                    log_system = EventSystem.default().handlers['log']
                     if log_system:
                         log_system.log_info(f"事件处理失败，第{attempt+1}次重试: {str(e)}")
                     time.sleep(delay)
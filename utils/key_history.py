@@ -0,0 +1,56 @@
+"""
+按键历史
+固定容量的环形缓冲区，键盘钩子线程写入，其他线程通过快照读取，不需要加锁。
+"""
+from typing import List, Optional, Tuple
+
+class KeyHistory:
+    """
+    最近按下的键及其时间戳
+
+    只允许一个线程调用append()。写入先填槽位再增加计数，
+    读取方根据前后两次读到的计数丢弃读取期间被覆盖的槽位。
+    槽位比容量多一个：正在写入的槽位（计数尚未增加）总是在可读范围之外，
+    不会读到新键和旧时间戳混在一起的记录。
+    """
+    def __init__(self, capacity: int = 20) -> None:
+        if capacity <= 0:
+            raise ValueError("容量必须大于0")
+        self.capacity = capacity
+        self._slots = capacity + 1
+        self._keys: List[str] = [''] * self._slots
+        self._times: List[float] = [0.0] * self._slots
+        self._count = 0  # 写入过的总数，只由写入方增加
+        self._start = 0  # clear()时的计数，只由读取方修改
+
+    def append(self, key: str, timestamp: float) -> None:
+        """记录一次按键，O(1)"""
+        i = self._count % self._slots
+        self._keys[i] = key
+        self._times[i] = timestamp
+        self._count += 1
+
+    def snapshot(self) -> List[Tuple[str, float]]:
+        """按时间顺序返回当前缓冲区中的(键, 时间戳)"""
+        end = self._count
+        begin = max(self._start, end - self.capacity)
+        slots = self._slots
+        items = [(self._keys[i % slots], self._times[i % slots]) for i in range(begin, end)]
+        # 读取期间写入方可能已经覆盖了最早的槽位；计数为c时正在写入的是第c个记录的槽位，
+        # 与第c - slots个相同，因此第c + 1 - slots个之前的记录都不可信
+        overwritten = self._count + 1 - slots - begin
+        if overwritten > 0:
+            del items[:overwritten]
+        return items
+
+    def last(self) -> Optional[Tuple[str, float]]:
+        """最近一次按键"""
+        items = self.snapshot()
+        return items[-1] if items else None
+
+    def clear(self) -> None:
+        """丢弃已有的记录"""
+        self._start = self._count
+
+    def __len__(self) -> int:
+        return min(self._count - self._start, self.capacity)
@@ -7,12 +7,16 @@ Keyboard Helper - 解决Pygame键盘输入问题的辅助库
 新增功能：组合键支持，统一接口
 """
 
+import functools
 import threading
 import time
 from typing import Dict, Set, Callable, Optional, List, Any, Tuple#, Union
 import keyboard
 from keyboard import KeyboardEvent
 
+from .combo_matcher import ComboMatcher, key_mask, parse_combo
+from .key_history import KeyHistory
+
 class KeyboardHelper:
     """
     键盘辅助类，使用 keyboard 库提供可靠的键盘输入检测
@@ -20,21 +24,22 @@ class KeyboardHelper:
     """
     
     def __init__(self) -> None:
-        self._keys_pressed: Set[str] = set()
+        self._pressed_mask: int = 0  # 按下的键，以键编码为位的位集
         self._key_handlers: Dict[str, List[Callable[[], Any]]] = {}
         
-        # 新增：组合键处理
-        self._combo_handlers: Dict[Tuple[str, ...], List[Callable[[], Any]]] = {}
-        self._combo_check_interval: float = 0.05  # 检查组合键的时间间隔（秒）
-        self._combo_check_thread: Optional[threading.Thread] = None
-        self._combo_keys_buffer: List[Tuple[str, float]] = []  # 记录按键和时间戳
+        # 新增：组合键处理，组合键编译为前缀树，按键时增量匹配
+        self._combo_matcher = ComboMatcher()
+        self._press_times: Dict[int, float] = {}  # 每个键最近一次按下的时间
+        self._combo_keys_buffer = KeyHistory(20)  # 最近20次按键和时间戳，环形缓冲区
         
         self._running = False
-        self._thread: Optional[threading.Thread] = None
         
         # 键名到字符的映射（用于其他用途，不作为参数传递）
         self._key_char_map = self._create_key_char_map()
         
+        # 处理函数的调度器，为None时在键盘钩子线程中直接调用
+        self._dispatcher: Optional[Callable[[Callable[[], Any]], Any]] = None
+        
         # 用于跟踪已注册的 keyboard 钩子
         self._keyboard_hooks: List[Any] = []
         
@@ -52,6 +57,26 @@ class KeyboardHelper:
         
         # 创建按键名标准化映射表
         self._key_normalization_map = self._create_key_normalization_map()
+        
+        # 键名驻留为整数编码，原始键名 -> (编码, 是否处理) 的查找表
+        self._key_codes: Dict[str, int] = {}
+        self._key_names: List[str] = []
+        self._key_table: Dict[str, Tuple[int, bool]] = {}
+        self._intern_lock = threading.Lock()
+        self._accepted_keys: Set[str] = (
+            set(self._key_char_map) | self._modifier_keys | set(self._key_normalization_map.values())
+        )
+        self._build_key_table()
+        self._modifier_mask = key_mask(self._key_code(key) for key in self._modifier_keys)
+    
+    @property
+    def _combo_max_interval(self) -> float:
+        """组合键中键之间的最大时间间隔（秒）"""
+        return self._combo_matcher.max_interval
+    
+    @_combo_max_interval.setter
+    def _combo_max_interval(self, interval: float) -> None:
+        self._combo_matcher.max_interval = interval
     
     def _create_key_char_map(self) -> Dict[str, str]:
         """创建键名到字符的映射表"""
@@ -144,6 +169,38 @@ class KeyboardHelper:
         
         return normalization_map
     
+    def _build_key_table(self) -> None:
+        """预先计算已知键名的查找表"""
+        for key_name in (*self._key_char_map, *self._modifier_keys,
+                         *self._key_normalization_map, *self._key_normalization_map.values()):
+            self._lookup_key(key_name)
+    
+    def _intern(self, key_name: str) -> int:
+        """把标准化后的键名转换为整数编码"""
+        code = self._key_codes.get(key_name)
+        if code is None:
+            with self._intern_lock:
+                code = self._key_codes.get(key_name)
+                if code is None:
+                    code = len(self._key_names)
+                    self._key_names.append(key_name)
+                    self._key_codes[key_name] = code
+        return code
+    
+    def _lookup_key(self, raw_name: str) -> Tuple[int, bool]:
+        """原始键名对应的(编码, 是否处理)，未知键名计算一次后缓存"""
+        entry = self._key_table.get(raw_name)
+        if entry is None:
+            key_name = self._normalize_key_name(raw_name)
+            # 忽略过长的按键名（通常是特殊功能键），但允许修饰键
+            accepted = len(key_name) <= 1 or key_name in self._accepted_keys
+            entry = self._key_table[raw_name] = (self._intern(key_name), accepted)
+        return entry
+    
+    def _key_code(self, key_name: str) -> int:
+        """键名对应的编码"""
+        return self._lookup_key(key_name)[0]
+    
     def start(self) -> None:
         """启动键盘监听"""  
         if self._running:
@@ -154,166 +211,77 @@ class KeyboardHelper:
         # 注册 keyboard 事件处理器
         self._setup_keyboard_hooks()
         
-        # 启动组合键检查线程
-        self._start_combo_check_thread()
-        
         # print("KeyboardHelper 已启动")
     
     def _setup_keyboard_hooks(self) -> None:
         """设置 keyboard 库的事件钩子"""
-        # 按键按下事件
-        def on_press(event: KeyboardEvent) -> None:
-            # 检查 event.name 是否为 None
-            if event.name is None:
-                return
-                
-            key_name = self._normalize_key_name(event.name)
-            
-            # 将按键记录到缓冲区（用于组合键检测）
-            self._combo_keys_buffer.append((key_name, time.time()))
-            
-            # 保留最近20个按键记录，防止内存泄漏
-            if len(self._combo_keys_buffer) > 20:
-                self._combo_keys_buffer.pop(0)
-            
-            # 忽略过长的按键名（通常是特殊功能键），但允许修饰键
-            if (len(key_name) > 1 and 
-                key_name not in self._key_char_map and 
-                key_name not in self._modifier_keys and
-                key_name not in self._key_normalization_map.values()):
-                return
-                
-            if key_name not in self._keys_pressed:
-                self._keys_pressed.add(key_name)
-                self._trigger_key_handlers(key_name)
-        
-        # 按键释放事件
-        def on_release(event: KeyboardEvent) -> None:
-            # 检查 event.name 是否为 None
-            if event.name is None:
-                return
-                
-            key_name = self._normalize_key_name(event.name)
-            
-            # 忽略过长的按键名，但允许修饰键
-            if (len(key_name) > 1 and 
-                key_name not in self._key_char_map and 
-                key_name not in self._modifier_keys and
-                key_name not in self._key_normalization_map.values()):
-                return
-                
-            if key_name in self._keys_pressed:
-                self._keys_pressed.remove(key_name)
-        
-        # 注册钩子
-        self._keyboard_hooks.append(keyboard.on_press(on_press))
-        self._keyboard_hooks.append(keyboard.on_release(on_release))
+        self._keyboard_hooks.append(keyboard.on_press(self._on_press))
+        self._keyboard_hooks.append(keyboard.on_release(self._on_release))
+    
+    def _on_press(self, event: KeyboardEvent) -> None:
+        """按键按下事件"""
+        # 检查 event.name 是否为 None
+        if event.name is None:
+            return
+
+        code, accepted = self._lookup_key(event.name)
+        key_name = self._key_names[code]
+
+        # 将按键记录到缓冲区
+        now = time.time()
+        self._combo_keys_buffer.append(key_name, now)
+
+        if not accepted:
+            return
+
+        bit = 1 << code
+        if not self._pressed_mask & bit:
+            self._pressed_mask |= bit
+            self._press_times[code] = now
+            self._trigger_key_handlers(key_name)
+            self._check_combos(code, now)
+    
+    def _on_release(self, event: KeyboardEvent) -> None:
+        """按键释放事件"""
+        # 检查 event.name 是否为 None
+        if event.name is None:
+            return
+
+        code, accepted = self._lookup_key(event.name)
+        if accepted:
+            self._pressed_mask &= ~(1 << code)
     
     def _normalize_key_name(self, key_name: str) -> str:
         """标准化键名"""
         key_name = key_name.lower()
-        
-        # 首先检查映射表
-        if key_name in self._key_normalization_map:
-            return self._key_normalization_map[key_name]
-        
-        # 处理左右修饰键（如果不在映射表中）
-        if key_name in ['left ctrl', 'right ctrl']:
-            return 'ctrl'
-        elif key_name in ['left shift', 'right shift']:
-            return 'shift'
-        elif key_name in ['left alt', 'right alt']:
-            return 'alt'
-        elif key_name in ['left windows', 'right windows']:
-            return 'windows'
-        
-        # 处理小键盘加号键（额外处理）
-        if key_name == 'num +':
-            return 'plus'
-            
-        return key_name
+        # 左右修饰键、小键盘键等都在映射表中
+        return self._key_normalization_map.get(key_name, key_name)
     
-    def _start_combo_check_thread(self) -> None:
-        """启动组合键检查线程"""
-        if self._combo_check_thread and self._combo_check_thread.is_alive():
-            return
-            
-        def combo_checker():
-            while self._running:
-                try:
-                    self._check_combos()
-                except Exception as e:
-                    print(f"组合键检查错误: {e}")
-                
-                time.sleep(self._combo_check_interval)
-        
-        self._combo_check_thread = threading.Thread(
-            target=combo_checker,
-            daemon=True,
-            name="ComboChecker"
+    def _check_combos(self, code: int, now: float) -> None:
+        """按键按下时推进组合键匹配，触发完成的组合键"""
+        handlers = self._combo_matcher.feed(
+            code,
+            now,
+            self._pressed_mask,
+            self._press_times,
+            bool(self._modifier_mask >> code & 1)
         )
-        self._combo_check_thread.start()
+        for handler in handlers:
+            self._invoke(handler, "组合键处理函数错误")
     
-    def _check_combos(self) -> None:
-        """检查是否有组合键被按下"""
-        if not self._combo_handlers or not self._keys_pressed:
-            return
-        
-        # 清理过时的按键记录（超过最大间隔的）
-        current_time = time.time()
-        self._combo_keys_buffer = [
-            (key, timestamp) for key, timestamp in self._combo_keys_buffer
-            if current_time - timestamp <= self._combo_max_interval
-        ]
-        
-        # 获取当前按下的所有键
-        pressed_keys = frozenset(self._keys_pressed)
-        
-        # 检查每个注册的组合键
-        for combo_keys, handlers in self._combo_handlers.items():
-            # 如果组合键的所有键都在当前按下的键集合中
-            if all(key in pressed_keys for key in combo_keys):
-                # 检查按键顺序是否匹配（在时间窗口内按正确顺序按下）
-                if self._check_combo_sequence(combo_keys):
-                    # 触发所有处理函数
-                    for handler in handlers:
-                        try:
-                            handler()
-                        except Exception as e:
-                            print(f"组合键处理函数错误: {e}")
-    
-    def _check_combo_sequence(self, combo_keys: Tuple[str, ...]) -> bool:
+    def _check_combo_sequence(self, combo_keys: Tuple[int, ...]) -> bool:
         """
         检查按键序列是否匹配组合键要求
         返回True如果按键按正确顺序在时间窗口内按下
         """
-        if not self._combo_keys_buffer:
-            return False
-        
-        # 查找组合键中每个键的最近按下时间
-        key_times = {}
-        for key, timestamp in reversed(self._combo_keys_buffer):
-            if key in combo_keys and key not in key_times:
-                key_times[key] = timestamp
-        
-        key_times:Dict[str,float]
-        # 确保所有键都被按下过
-        if len(key_times) != len(combo_keys):
+        if combo_keys[-1] not in self._press_times:
             return False
-        
-        # 检查按键是否在时间窗口内按正确顺序按下
-        times = [key_times[key] for key in combo_keys]
-        
-        # 按键应该按顺序越来越新（时间戳越来越大）
-        for i in range(1, len(times)):
-            if times[i] < times[i-1]:
-                return False
-            
-            # 检查时间间隔是否超过最大值
-            if times[i] - times[i-1] > self._combo_max_interval:
-                return False
-        
-        return True
+        return self._combo_matcher.chord_in_order(
+            combo_keys[:-1],
+            self._press_times[combo_keys[-1]],
+            self._pressed_mask,
+            self._press_times
+        )
     
     def stop(self) -> None:
         """停止键盘监听"""
@@ -325,12 +293,10 @@ class KeyboardHelper:
         self._keyboard_hooks.clear()
         
         # 清空按键状态
-        self._keys_pressed.clear()
+        self._pressed_mask = 0
+        self._press_times.clear()
         self._combo_keys_buffer.clear()
-        
-        # 等待组合键检查线程结束
-        if self._combo_check_thread and self._combo_check_thread.is_alive():
-            self._combo_check_thread.join(timeout=1.0)
+        self._combo_matcher.reset()
         
         # print("KeyboardHelper 已停止")
     
@@ -338,10 +304,31 @@ class KeyboardHelper:
         """触发按键处理函数"""
         if key_name in self._key_handlers:
             for handler in self._key_handlers[key_name]:
-                try:
-                    handler()
-                except Exception as e:
-                    print(f"按键处理函数错误: {e}")
+                self._invoke(handler, "按键处理函数错误")
+    
+    def set_dispatcher(self, dispatcher: Optional[Callable[[Callable[[], Any]], Any]]) -> None:
+        """
+        设置处理函数的调度器
+        
+        Args:
+            dispatcher: 接受一个无参函数并安排其执行，如 Windows.call_soon；
+                        为None时处理函数在键盘钩子线程中直接执行
+        """
+        self._dispatcher = dispatcher
+    
+    def _invoke(self, handler: Callable[[], Any], error_message: str) -> None:
+        """执行或通过调度器转交处理函数"""
+        if self._dispatcher is None:
+            self._run_handler(handler, error_message)
+        else:
+            self._dispatcher(functools.partial(self._run_handler, handler, error_message))
+    
+    @staticmethod
+    def _run_handler(handler: Callable[[], Any], error_message: str) -> None:
+        try:
+            handler()
+        except Exception as e:
+            print(f"{error_message}: {e}")
     
     def add_key_handler(self, key_name: str, handler: Callable[[], Any]) -> None:
         """
@@ -381,7 +368,8 @@ class KeyboardHelper:
         添加组合键处理函数
         
         Args:
-            *keys: 组合键的各个部分，如 'ctrl', 'c'
+            *keys: 组合键的各个部分，如 'ctrl', 'c'；
+                   多步序列每步用'+'连接，如 'ctrl+k', 'ctrl+c'
             handler: 处理函数，不接受参数
         """
         # 类型检查
@@ -397,21 +385,13 @@ class KeyboardHelper:
             print(f"警告：组合键处理函数不应该接受参数")
         
         # 标准化键名
-        normalized_keys = []
-        normalized_keys:List[str]
-        for key in keys:
-            norm_key = self._normalize_key_name(key.strip().lower())
-            normalized_keys.append(norm_key)
-        
-        combo_keys = tuple(normalized_keys)
+        steps = parse_combo(keys, self._key_code)
         
         # 确保至少有两个键
-        if len(combo_keys) < 2:
+        if sum(len(step) for step in steps) < 2 or not all(steps):
             raise ValueError("组合键必须至少包含两个键")
         
-        if combo_keys not in self._combo_handlers:
-            self._combo_handlers[combo_keys] = []
-        self._combo_handlers[combo_keys].append(handler)
+        self._combo_matcher.add(steps, handler)
     
     def remove_key_handler(self, key_name: str, handler: Callable[[], Any]) -> None:
         """移除按键处理函数"""   
@@ -426,23 +406,11 @@ class KeyboardHelper:
     
     def remove_combo_handler(self, *keys: str, handler: Callable[[], Any]) -> None:
         """移除组合键处理函数"""
-        normalized_keys = []
-        normalized_keys:List[str]
-        for key in keys:
-            norm_key = self._normalize_key_name(key.strip().lower())
-            normalized_keys.append(norm_key)
-        
-        combo_keys = tuple(normalized_keys)
-        
-        if combo_keys in self._combo_handlers and handler in self._combo_handlers[combo_keys]:
-            self._combo_handlers[combo_keys].remove(handler)
-            # 如果该组合键没有处理函数了，删除整个条目
-            if not self._combo_handlers[combo_keys]:
-                del self._combo_handlers[combo_keys]
+        self._combo_matcher.remove(parse_combo(keys, self._key_code), handler)
     
     def is_key_pressed(self, key_name: str) -> bool:
         """检查按键是否被按下"""
-        return self._normalize_key_name(key_name) in self._keys_pressed
+        return bool(self._pressed_mask >> self._key_code(key_name) & 1)
     
     def is_combo_pressed(self, *keys: str) -> bool:
         """
@@ -454,17 +422,11 @@ class KeyboardHelper:
         Returns:
             bool: 如果所有键都按下且符合按键顺序则返回True
         """
-        normalized_keys = []
-        normalized_keys:List[str]
-        for key in keys:
-            norm_key = self._normalize_key_name(key.strip().lower())
-            normalized_keys.append(norm_key)
-        
-        combo_keys = tuple(normalized_keys)
-        pressed_keys = frozenset(self._keys_pressed)
+        combo_keys = tuple(self._key_code(key.strip()) for key in keys)
         
         # 检查所有键是否都按下
-        if not all(key in pressed_keys for key in combo_keys):
+        mask = key_mask(combo_keys)
+        if self._pressed_mask & mask != mask:
             return False
         
         # 检查按键顺序
@@ -472,7 +434,8 @@ class KeyboardHelper:
     
     def get_all_pressed_keys(self) -> List[str]:
         """获取当前按下的所有键"""
-        return list(self._keys_pressed)
+        mask = self._pressed_mask
+        return [name for code, name in enumerate(self._key_names) if mask >> code & 1]
     
     def get_key_char(self, key_name: str) -> Optional[str]:
         """获取键名对应的字符（不用于处理函数参数）"""   
@@ -480,9 +443,12 @@ class KeyboardHelper:
     
     def get_last_key(self) -> Optional[str]:
         """获取最近按下的键"""
-        if not self._combo_keys_buffer:
-            return None
-        return self._combo_keys_buffer[-1][0]
+        last = self._combo_keys_buffer.last()
+        return None if last is None else last[0]
+    
+    def get_key_history(self) -> List[Tuple[str, float]]:
+        """获取最近按下的键及时间戳（按时间顺序的快照）"""
+        return self._combo_keys_buffer.snapshot()
     
     def set_combo_max_interval(self, interval: float) -> None:
         """
@@ -547,6 +513,10 @@ def get_last_key() -> Optional[str]:
     """获取最近按下的键"""
     return _keyboard_helper.get_last_key()
 
+def get_key_history() -> List[Tuple[str, float]]:
+    """获取最近按下的键及时间戳"""
+    return _keyboard_helper.get_key_history()
+
 def set_combo_max_interval(interval: float) -> None:
     """设置组合键的最大时间间隔"""
     _keyboard_helper.set_combo_max_interval(interval)
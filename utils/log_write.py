@@ -1,14 +1,129 @@
 import time
+import queue
+import threading
 import _io
+from typing import List, Optional, Tuple
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+_LEVEL_NAMES = {
+    DEBUG: 'DEBUG',
+    INFO: 'INFO',
+    WARNING: 'WARNING',
+    ERROR: 'ERROR'
+}
 
 class LogSystem:
-    def __init__(self , file:_io.TextIOWrapper) -> None:
+    """
+    日志系统
+
+    buffered为True时日志先放入队列，由后台线程攒够batch_size条
+    或每隔flush_interval秒批量写入，退出前需要调用close()；
+    close()之后的日志直接写入文件。
+    """
+    def __init__(self,
+                 file:_io.TextIOWrapper,
+                 buffered:bool = False,
+                 level:int = DEBUG,
+                 batch_size:int = 64,
+                 flush_interval:float = 0.5
+                 ) -> None:
         self.file = file
+        self.level = level
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffered = buffered
+        # (秒, 格式化的时间戳)，整体替换，多线程下不会拿到不配对的两项
+        self._stamp: Tuple[int, str] = (-1, '')
+        self._lock = threading.Lock()
+        self._closed = False
+        self._queue: 'queue.SimpleQueue[Optional[Tuple[str, int, str]]]' = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        if buffered:
+            self._thread = threading.Thread(target=self._writer, daemon=True, name="LogWriter")
+            self._thread.start()
 
-    def log_info(self,info:str) -> None:
-        self.file.write(f"[{time.strftime("%Y.%m.%d-%H.%M.%S")}] [INFO] {info}\n")
+    def _timestamp(self) -> str:
+        """时间戳，每秒只格式化一次"""
+        second = int(time.time())
+        cached, stamp = self._stamp
+        if second != cached:
+            stamp = time.strftime("%Y.%m.%d-%H.%M.%S", time.localtime(second))
+            self._stamp = (second, stamp)
+        return stamp
+
+    @staticmethod
+    def _format(stamp:str, level:int, message:str) -> str:
+        return f"[{stamp}] [{_LEVEL_NAMES.get(level, str(level))}] {message}\n"
+
+    def log(self, level:int, message:str) -> None:
+        """按级别记录日志，低于self.level的会被忽略"""
+        if level < self.level:
+            return
+        if self.buffered:
+            with self._lock:
+                if not self._closed:
+                    self._queue.put((self._timestamp(), level, message))
+                    return
+        self.file.write(self._format(self._timestamp(), level, message))
         self.file.flush()
 
+    def log_debug(self,debug:str) -> None:
+        self.log(DEBUG, debug)
+
+    def log_info(self,info:str) -> None:
+        self.log(INFO, info)
+
+    def log_warning(self,warning:str) -> None:
+        self.log(WARNING, warning)
+
     def log_error(self,error:str) -> None:
-        self.file.write(f"[{time.strftime("%Y.%m.%d-%H.%M.%S")}] [ERROR] {error}\n")
-        self.file.flush()
\ No newline at end of file
+        self.log(ERROR, error)
+
+    def _writer(self) -> None:
+        """后台线程：批量写入并刷新"""
+        batch: List[str] = []
+        deadline = None
+        running = True
+        while running:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                record = ()
+            if record is None:
+                running = False
+                # close()持有锁时放入结束标记，之后不会再有新日志入队，这里取完剩下的
+                while True:
+                    try:
+                        record = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if record:
+                        batch.append(self._format(*record))
+            elif record:
+                batch.append(self._format(*record))
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch and (not running
+                          or len(batch) >= self.batch_size
+                          or time.monotonic() >= deadline):  # type: ignore
+                self.file.write(''.join(batch))
+                self.file.flush()
+                batch.clear()
+                deadline = None
+
+    def close(self) -> None:
+        """写完队列中的日志并停止后台线程"""
+        # 持锁直到后台线程退出，此期间其它线程的日志会等待，之后直接写入文件
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None